@@ -0,0 +1,68 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FakeUser:
+    id: int
+    name: str = "benchmark"
+    global_name: str = "benchmark"
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+
+@dataclass
+class FakeChannel:
+    id: int = 0
+
+
+class FakeResponse:
+    def __init__(self, context: "FakeContext"):
+        self.context = context
+
+    async def defer(self, *args, **kwargs):
+        self.context.deferred = True
+
+
+class FakeFollowup:
+    def __init__(self, context: "FakeContext"):
+        self.context = context
+
+    async def send(self, *args, **kwargs):
+        self.context.messages.append((args, kwargs))
+
+
+@dataclass
+class FakeCommand:
+    name: str
+
+
+@dataclass
+class FakeContext:
+    """
+    Stands for the discord.ApplicationContext given to the commands, recording what they send instead.
+    """
+
+    author: FakeUser
+    command: FakeCommand
+    channel: FakeChannel = field(default_factory=FakeChannel)
+    deferred: bool = False
+    messages: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    @property
+    def user(self) -> FakeUser:
+        return self.author
+
+    async def defer(self, *args, **kwargs):
+        self.deferred = True
+
+    async def respond(self, *args, **kwargs):
+        self.messages.append((args, kwargs))
+
+    async def send(self, *args, **kwargs):
+        self.messages.append((args, kwargs))
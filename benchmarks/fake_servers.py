@@ -0,0 +1,339 @@
+import asyncio
+import io
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+from PIL import Image
+
+
+@dataclass
+class UpstreamProfile:
+    """
+    How a fake upstream behaves: its latency in seconds, the share of requests answered with an error,
+    and the amount of requests per second above which it answers 429 (None for no limit).
+    """
+
+    latency: float = 0.05
+    jitter: float = 0.02
+    error_rate: float = 0.0
+    rate_limit: float | None = None
+
+    async def delay(self):
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+
+def make_avatar() -> bytes:
+    image = Image.new("RGB", (240, 240), (0, 112, 209))
+    output = io.BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def make_title(index: int) -> dict:
+    last_played = datetime.now(timezone.utc) - timedelta(days=index)
+    return {
+        "titleId": f"CUSA{index:05}_00",
+        "name": f"Benchmark Game {index}",
+        "imageUrl": "https://image.api.playstation.com/icon.png",
+        "category": "ps5_native_game" if index % 2 else "ps4_game",
+        "playCount": index % 50 + 1,
+        "firstPlayedDateTime": (last_played - timedelta(days=30)).strftime(
+            "%Y-%m-%dT%H:%M:%S.%fZ"
+        ),
+        "lastPlayedDateTime": last_played.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "playDuration": f"PT{(index * 37) % 400}H{index % 60}M{index % 60}S",
+    }
+
+
+def make_game(game_id: int) -> dict:
+    return {
+        "id": game_id,
+        "name": f"Benchmark Game {game_id}",
+        "summary": "A game served by the fake IGDB server. " * 8,
+        "involved_companies": [{"company": {"name": "Benchmark Studio"}}],
+        "cover": {"url": "//images.igdb.com/igdb/image/upload/t_thumb/co1.jpg"},
+        "similar_games": [{"name": f"Benchmark Game {game_id + 1}"}],
+        "platforms": [{"name": "PlayStation 5"}],
+        "first_release_date": 1600000000,
+        "videos": [{"video_id": "dQw4w9WgXcQ"}],
+        "artworks": [{"url": "//images.igdb.com/igdb/image/upload/t_thumb/ar1.jpg"}],
+        "url": f"https://www.igdb.com/games/benchmark-game-{game_id}",
+        "genres": [{"name": "Adventure"}],
+        "keywords": [{"name": "benchmark"}],
+        "rating": 80.0,
+    }
+
+
+class FakeUpstreams:
+    def __init__(
+        self,
+        psn: UpstreamProfile,
+        igdb: UpstreamProfile,
+        store: UpstreamProfile,
+        titles_per_user: int = 300,
+    ):
+        """
+        Local HTTP server answering like the PSN, Twitch/IGDB and PlayStation Store endpoints used by the bot.
+        It runs on its own thread and event loop, so it doesn't weigh on the loop of the measured bot.
+
+        Args:
+            psn (UpstreamProfile): The behaviour of the PSN endpoints.
+            igdb (UpstreamProfile): The behaviour of the Twitch and IGDB endpoints.
+            store (UpstreamProfile): The behaviour of the PlayStation Store endpoints.
+            titles_per_user (int): The amount of played titles of every fake user.
+        """
+        self.profiles = {"psn": psn, "igdb": igdb, "store": store}
+        self.titles = [make_title(index) for index in range(titles_per_user)]
+        self.avatar = make_avatar()
+        self.requests = {"psn": 0, "igdb": 0, "store": 0}
+        self.throttled = {"psn": 0, "igdb": 0, "store": 0}
+        # Start and amount of requests of the current one second window of each upstream
+        self.windows = {upstream: (0.0, 0) for upstream in self.profiles}
+        # The pdccws_p cookies the store received for each product ID and SKU ID
+        self.store_cookies: dict[str, list[str]] = defaultdict(list)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.runner: web.AppRunner | None = None
+        self.url = ""
+
+    def start(self) -> str:
+        "Starts the server, returning its base URL."
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.serve(), self.loop).result()
+        return self.url
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def serve(self):
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/psn/auth/authz/v3/oauth/authorize", self.oauth_code),
+                web.post("/psn/auth/authz/v3/oauth/token", self.access_token),
+                web.get("/psn/legacy/{online_id}/profile2", self.legacy_profile),
+                web.get("/psn/profile/{account_id}/profiles", self.profile),
+                web.get(
+                    "/psn/profile/me/friends/{account_id}/summary", self.friendship
+                ),
+                web.get("/psn/profile/{account_id}/basicPresences", self.presence),
+                web.get(
+                    "/psn/trophies/users/{account_id}/trophySummary",
+                    self.trophy_summary,
+                ),
+                web.get("/psn/games/users/{account_id}/titles", self.title_stats),
+                web.post("/psn/graphql", self.universal_search),
+                web.get("/psn/avatar.png", self.avatar_image),
+                web.post("/igdb/token", self.twitch_token),
+                web.post("/igdb/games", self.igdb_games),
+                web.post("/igdb/multiquery", self.igdb_multiquery),
+                web.get("/store/container/{path:.+}", self.store_container),
+                web.post("/store/graphql", self.store_graphql),
+            ]
+        )
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    def over_rate_limit(self, upstream: str) -> bool:
+        rate_limit = self.profiles[upstream].rate_limit
+        if rate_limit is None:
+            return False
+
+        now = time.monotonic()
+        started_at, count = self.windows[upstream]
+        if now - started_at >= 1:
+            started_at, count = now, 0
+        self.windows[upstream] = (started_at, count + 1)
+        return count >= rate_limit
+
+    async def respond(self, upstream: str, payload) -> web.Response:
+        "Answers like the given upstream would, after its latency, sometimes with an error."
+        self.requests[upstream] += 1
+        if self.over_rate_limit(upstream):
+            self.throttled[upstream] += 1
+            return web.json_response(
+                {"error": "Too many requests"}, status=429, headers={"Retry-After": "1"}
+            )
+        profile = self.profiles[upstream]
+        await profile.delay()
+        if profile.should_fail():
+            return web.json_response({"error": "Injected failure"}, status=503)
+        return web.json_response(payload)
+
+    async def oauth_code(self, request: web.Request) -> web.Response:
+        raise web.HTTPFound("com.scee.psxandroid.scecompcall://redirect?code=benchmark")
+
+    async def access_token(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "access_token": "benchmark-access-token",
+                "refresh_token": "benchmark-refresh-token",
+                "expires_in": 3600,
+                "refresh_token_expires_in": 60 * 24 * 60 * 60,
+            }
+        )
+
+    async def legacy_profile(self, request: web.Request) -> web.Response:
+        online_id = request.match_info["online_id"]
+        account_id = str(abs(hash(online_id)) % 10**18)
+        return await self.respond(
+            "psn", {"profile": {"onlineId": online_id, "accountId": account_id}}
+        )
+
+    async def profile(self, request: web.Request) -> web.Response:
+        account_id = request.match_info["account_id"]
+        return await self.respond(
+            "psn",
+            {
+                "onlineId": f"user_{account_id[:8]}",
+                "aboutMe": "Benchmark account",
+                "avatars": [
+                    {"size": "s", "url": f"{self.url}/psn/avatar.png?s={account_id}"},
+                    {"size": "xl", "url": f"{self.url}/psn/avatar.png?xl={account_id}"},
+                ],
+                "languages": ["en-US"],
+                "isPlus": True,
+                "isOfficiallyVerified": False,
+                "isMe": False,
+            },
+        )
+
+    async def friendship(self, request: web.Request) -> web.Response:
+        return await self.respond(
+            "psn",
+            {"friendsCount": 42, "mutualFriendsCount": -1, "friendRelation": "no"},
+        )
+
+    async def presence(self, request: web.Request) -> web.Response:
+        return await self.respond(
+            "psn",
+            {
+                "basicPresence": {
+                    "availability": "availableToPlay",
+                    "primaryPlatformInfo": {
+                        "onlineStatus": "online",
+                        "platform": "PS5",
+                    },
+                    "gameTitleInfoList": [{"titleName": "Benchmark Game 0"}],
+                }
+            },
+        )
+
+    async def trophy_summary(self, request: web.Request) -> web.Response:
+        return await self.respond(
+            "psn",
+            {
+                "trophyLevel": 321,
+                "progress": 42,
+                "tier": 4,
+                "earnedTrophies": {
+                    "bronze": 1000,
+                    "silver": 300,
+                    "gold": 80,
+                    "platinum": 12,
+                },
+            },
+        )
+
+    async def title_stats(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get("limit", 200))
+        offset = int(request.query.get("offset", 0))
+        next_offset = offset + limit
+        return await self.respond(
+            "psn",
+            {
+                "titles": self.titles[offset:next_offset],
+                "nextOffset": next_offset if next_offset < len(self.titles) else None,
+                "totalItemCount": len(self.titles),
+            },
+        )
+
+    async def universal_search(self, request: web.Request) -> web.Response:
+        return await self.respond(
+            "psn",
+            {
+                "data": {
+                    "universalContextSearch": {
+                        "results": [
+                            {
+                                "searchResults": [
+                                    {
+                                        "result": {
+                                            "media": [
+                                                {"role": "MASTER", "url": "m.png"},
+                                                {"role": "SCREENSHOT", "url": "s.png"},
+                                                {"role": "BACKGROUND", "url": "b.png"},
+                                            ]
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                }
+            },
+        )
+
+    async def avatar_image(self, request: web.Request) -> web.Response:
+        await self.profiles["psn"].delay()
+        return web.Response(body=self.avatar, content_type="image/png")
+
+    async def twitch_token(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"access_token": "benchmark-igdb-token", "expires_in": 5_000_000}
+        )
+
+    async def igdb_games(self, request: web.Request) -> web.Response:
+        query = await request.text()
+        if query.startswith("where id"):
+            game_id = int(query.split("=")[1].split(";")[0])
+            return await self.respond("igdb", [make_game(game_id)])
+        return await self.respond(
+            "igdb",
+            [
+                {"id": game_id, "name": f"Benchmark Game {game_id}"}
+                for game_id in range(1, 21)
+            ],
+        )
+
+    async def igdb_multiquery(self, request: web.Request) -> web.Response:
+        query = await request.text()
+        query_count = query.count("query games")
+        return await self.respond(
+            "igdb",
+            [
+                {"name": str(index), "result": [make_game(index + 1)]}
+                for index in range(query_count)
+            ],
+        )
+
+    async def store_container(self, request: web.Request) -> web.Response:
+        product_id = request.match_info["path"].rstrip("/").split("/")[-1]
+        self.store_cookies[product_id].append(request.cookies.get("pdccws_p"))
+        return await self.respond(
+            "store",
+            {"default_sku": {"id": f"{product_id}-E001"}, "name": "Benchmark Avatar"},
+        )
+
+    async def store_graphql(self, request: web.Request) -> web.Response:
+        variables = (await request.json())["variables"]
+        for sku in variables.get("skus", [{"skuId": variables.get("skuId")}]):
+            self.store_cookies[sku["skuId"]].append(request.cookies.get("pdccws_p"))
+        return await self.respond(
+            "store", {"data": {"addToCart": {"cart": {"subTotalPrice": 0}}}}
+        )
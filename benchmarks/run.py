@@ -0,0 +1,302 @@
+"""
+Load benchmark of the commands of the bot against local fake upstreams.
+
+    python -m benchmarks.run --concurrency 1,8,32 --requests 200 --psn-latency 0.08
+    python -m benchmarks.run --compare latest
+
+Every run is stored as JSON in benchmarks/results, so it can be compared with a later one.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import discord
+from psnawp_api.utils.endpoints import BASE_PATH
+
+import config
+import modules.api.psn as store_api
+import modules.custom_psnawp as custom_psnawp
+from benchmarks.fake_context import FakeCommand, FakeContext, FakeUser
+from benchmarks.fake_servers import FakeUpstreams, UpstreamProfile
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+LAG_INTERVAL = 0.01  # Seconds between each probe of the event loop lag
+
+
+def point_to_upstreams(base_url: str, data_dir: str):
+    "Redirects every upstream URL and every file of the bot, before the bot is created."
+    BASE_PATH.update(
+        {
+            "base_uri": f"{base_url}/psn/auth",
+            "legacy_profile_uri": f"{base_url}/psn/legacy",
+            "profile_uri": f"{base_url}/psn/profile",
+            "trophies": f"{base_url}/psn/trophies",
+            "games_list": f"{base_url}/psn/games",
+        }
+    )
+    custom_psnawp.SEARCH_URL = f"{base_url}/psn/graphql"
+    store_api.STORE_URL = f"{base_url}/store/container"
+    store_api.GRAPHQL_URL = f"{base_url}/store/graphql"
+
+    config.DATABASE = os.path.join(data_dir, "bot.db")
+    config.IGDB_CACHE = os.path.join(data_dir, "igdb.db")
+    config.AVATAR_COLORS_CACHE = os.path.join(data_dir, "avatar_colors.json")
+    config.CACHE_USERS = os.path.join(data_dir, "users.json")
+    config.BANNED_USERS = os.path.join(data_dir, "bans.json")
+    config.USER_LANGUAGES = os.path.join(data_dir, "langs.json")
+
+
+def create_bot(base_url: str):
+    # Imported here so the cogs see the configuration changed by point_to_upstreams
+    from cogs.avatar_cog import AvatarCog
+    from cogs.psn_cog import PSNCog
+    from modules.custom_bot import Bot
+
+    bot = Bot(psn_api_token="benchmark", intents=discord.Intents.none())
+    bot.igdb.URLS.update(
+        {
+            "token": f"{base_url}/igdb/token",
+            "games": f"{base_url}/igdb/games",
+            "multiquery": f"{base_url}/igdb/multiquery",
+        }
+    )
+    return bot, PSNCog(bot), AvatarCog(bot)
+
+
+def make_scenarios(psn_cog, avatar_cog, users: int) -> dict:
+    "Each scenario runs one command for the n-th request, spread over a pool of users and queries."
+    return {
+        "user-search": lambda ctx, n: psn_cog.account_info.callback(
+            psn_cog, ctx, online_id=f"bench_user_{n % users}"
+        ),
+        "list-recent-games": lambda ctx, n: psn_cog.list_recent_games.callback(
+            psn_cog, ctx, online_id=f"bench_user_{n % users}"
+        ),
+        "game-search": lambda ctx, n: psn_cog.search_game.callback(
+            psn_cog, ctx, game_name=f"benchmark game {n % users}"
+        ),
+        "avatar-add": lambda ctx, n: avatar_cog.add.callback(
+            avatar_cog,
+            ctx,
+            pdccws_p="benchmark",
+            product_id=f"UP0000-CUSA{n % users:05}_00-AVATAR0000000001",
+            region="en-US",
+        ),
+    }
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+async def measure_loop_lag(lags: list[float], stop: asyncio.Event):
+    "Records how late the event loop wakes up a task sleeping for LAG_INTERVAL."
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - started_at - LAG_INTERVAL))
+
+
+async def run_level(scenario, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = Counter()
+    lags = []
+    next_request = iter(range(requests))
+
+    async def worker():
+        for n in next_request:
+            ctx = FakeContext(FakeUser(id=n % 1000), FakeCommand("benchmark"))
+            started_at = time.perf_counter()
+            try:
+                await scenario(ctx, n)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started_at)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(lags, stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started_at
+    stop.set()
+    await lag_task
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "succeeded": len(latencies),
+        "errors": dict(errors),
+        "duration": duration,
+        "throughput": len(latencies) / duration if duration else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "loop_lag_p99": percentile(lags, 99),
+        "loop_lag_max": lags[-1] if lags else 0.0,
+    }
+
+
+async def run_scenario(name: str, args, base_url: str) -> list[dict]:
+    levels = []
+    for concurrency in args.concurrency:
+        # A new bot for every level, so the caches filled by a level don't speed up the next one
+        with tempfile.TemporaryDirectory() as data_dir:
+            point_to_upstreams(base_url, data_dir)
+            bot, psn_cog, avatar_cog = create_bot(base_url)
+            scenario = make_scenarios(psn_cog, avatar_cog, args.users)[name]
+            try:
+                # The commands log every call, which would bury the results
+                with contextlib.redirect_stdout(io.StringIO()):
+                    levels.append(await run_level(scenario, concurrency, args.requests))
+            finally:
+                await bot.close()
+        print_level(name, levels[-1])
+    return levels
+
+
+def print_level(name: str, level: dict):
+    errors = sum(level["errors"].values())
+    print(
+        f"{name:<18} c={level['concurrency']:<4} "
+        f"p50={level['p50'] * 1000:8.1f}ms p95={level['p95'] * 1000:8.1f}ms p99={level['p99'] * 1000:8.1f}ms "
+        f"{level['throughput']:8.1f} req/s  lag p99={level['loop_lag_p99'] * 1000:6.1f}ms  errors={errors}"
+    )
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_report(report: dict) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(
+        RESULTS_DIR,
+        f"{report['started_at'].replace(':', '-')}_{report['revision']}.json",
+    )
+    with open(path, "w") as json_file:
+        json.dump(report, json_file, indent=2)
+    return path
+
+
+def load_report(path: str) -> dict:
+    if path == "latest":
+        reports = sorted(
+            file for file in os.listdir(RESULTS_DIR) if file.endswith(".json")
+        )
+        if not reports:
+            raise SystemExit("No stored benchmark to compare with.")
+        path = os.path.join(RESULTS_DIR, reports[-1])
+    with open(path, "r") as json_file:
+        return json.load(json_file)
+
+
+def compare(previous: dict, current: dict):
+    print(f"\nCompared with {previous['revision']} ({previous['started_at']}):")
+    for name, levels in current["scenarios"].items():
+        previous_levels = {
+            level["concurrency"]: level for level in previous["scenarios"].get(name, [])
+        }
+        for level in levels:
+            before = previous_levels.get(level["concurrency"])
+            if before is None:
+                continue
+            changes = "  ".join(
+                f"{metric} {(level[metric] - before[metric]) / before[metric] * 100:+.1f}%"
+                for metric in ("p50", "p95", "p99", "throughput")
+                if before[metric]
+            )
+            print(f"{name:<18} c={level['concurrency']:<4} {changes}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=["user-search", "list-recent-games", "game-search", "avatar-add"],
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 4, 16, 64],
+    )
+    parser.add_argument("--requests", type=int, default=200, help="per level")
+    parser.add_argument("--users", type=int, default=100, help="distinct users")
+    parser.add_argument("--titles", type=int, default=300, help="titles per user")
+    for upstream in ("psn", "igdb", "store"):
+        parser.add_argument(f"--{upstream}-latency", type=float, default=0.05)
+        parser.add_argument(f"--{upstream}-jitter", type=float, default=0.02)
+        parser.add_argument(f"--{upstream}-errors", type=float, default=0.0)
+        parser.add_argument(
+            f"--{upstream}-rate-limit", type=float, help="requests per second"
+        )
+    parser.add_argument("--compare", help="a stored report, or 'latest'")
+    parser.add_argument("--no-save", action="store_true")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    previous = load_report(args.compare) if args.compare else None
+
+    upstreams = FakeUpstreams(
+        *(
+            UpstreamProfile(
+                getattr(args, f"{upstream}_latency"),
+                getattr(args, f"{upstream}_jitter"),
+                getattr(args, f"{upstream}_errors"),
+                getattr(args, f"{upstream}_rate_limit"),
+            )
+            for upstream in ("psn", "igdb", "store")
+        ),
+        titles_per_user=args.titles,
+    )
+    base_url = upstreams.start()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "settings": {
+            key: value for key, value in vars(args).items() if key != "compare"
+        },
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenarios:
+            report["scenarios"][name] = await run_scenario(name, args, base_url)
+    finally:
+        upstreams.stop()
+    report["upstream_requests"] = upstreams.requests
+    report["upstream_throttled"] = upstreams.throttled
+
+    if not args.no_save:
+        print(f"\nSaved to {save_report(report)}")
+    if previous is not None:
+        compare(previous, report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
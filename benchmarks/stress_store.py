@@ -0,0 +1,159 @@
+"""
+Concurrency stress test of the shared PlayStation Store client against the local fake store.
+
+    python -m benchmarks.stress_store --requests 600 --rounds 3
+
+Every product is requested four times at once: twice with one cookie, which should share
+a single container request, and twice with another cookie, which should get its own.
+The run fails if a result carries the product of another call, or if the store received
+a request with the cookie of another user, or not once for each cookie.
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+
+import config
+import modules.api.psn as store_api
+from benchmarks.fake_servers import FakeUpstreams, UpstreamProfile
+from modules.api.psn import PSN, AvatarInfo, CartResult, PSNRequest
+from modules.api.session import SessionManager
+from modules.rate_limit import RateLimiter
+from modules.single_flight import coalesced_calls
+
+# The method called for every n-th request, and the type of its result
+OPERATIONS = (
+    ("check_avatar", AvatarInfo),
+    ("add_to_cart", CartResult),
+    ("remove_from_cart", CartResult),
+)
+
+
+REGIONS = ("en-US", "fr-FR", "ja-JP")
+
+
+def make_request(round_index: int, n: int) -> PSNRequest:
+    product = n // 4
+    return PSNRequest(
+        f"cookie-{round_index}-{n // 2}",
+        REGIONS[product % len(REGIONS)],
+        f"UP{round_index:04}-CUSA{product:05}_00-AVATAR{product:010}",
+    )
+
+
+def check_result(request: PSNRequest, result, expected_type: type) -> list[str]:
+    "The mix-ups between a request and its own result."
+    if not isinstance(result, expected_type):
+        return [f"{request.product_id}: unexpected result {result!r}"]
+
+    problems = []
+    if result.product_id != request.product_id:
+        problems.append(f"{request.product_id}: got the product {result.product_id}")
+    if result.sku_id != f"{request.product_id}-E001":
+        problems.append(f"{request.product_id}: got the SKU {result.sku_id}")
+    return problems
+
+
+def check_cookies(upstreams: FakeUpstreams, requests: list[PSNRequest]) -> list[str]:
+    """
+    The requests the store received with the cookie of another user, and the calls which
+    were answered with the container request of another user or sent it twice.
+    Every call of a round starts before the store answers, so none is served by the cache.
+    """
+    problems = []
+    cart_cookies: dict[str, Counter] = {}
+    for n, request in enumerate(requests):
+        if OPERATIONS[n % len(OPERATIONS)][1] is CartResult:
+            cart_cookies.setdefault(request.product_id, Counter())[
+                request.pdccws_p
+            ] += 1
+
+    for product_id in dict.fromkeys(request.product_id for request in requests):
+        cookies = {
+            request.pdccws_p for request in requests if request.product_id == product_id
+        }
+        received = Counter(upstreams.store_cookies.get(product_id, []))
+        if received != Counter(cookies):
+            problems.append(
+                f"{product_id}: the store received {dict(received)} for the cookies {sorted(cookies)}"
+            )
+
+        sku_id = f"{product_id}-E001"
+        received = Counter(upstreams.store_cookies.get(sku_id, []))
+        if received != cart_cookies.get(product_id, Counter()):
+            problems.append(
+                f"{sku_id}: the store received {dict(received)} for the cookies {dict(cart_cookies.get(product_id, {}))}"
+            )
+    return problems
+
+
+async def run_round(psn: PSN, round_index: int, count: int) -> tuple[list, list]:
+    requests = [make_request(round_index, n) for n in range(count)]
+    results = await asyncio.gather(
+        *(
+            getattr(psn, OPERATIONS[n % len(OPERATIONS)][0])(request)
+            for n, request in enumerate(requests)
+        ),
+        return_exceptions=True,
+    )
+    return requests, results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=600, help="per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    upstreams = FakeUpstreams(
+        UpstreamProfile(),
+        UpstreamProfile(),
+        UpstreamProfile(args.latency, args.jitter),
+    )
+    base_url = upstreams.start()
+    store_api.STORE_URL = f"{base_url}/store/container"
+    store_api.GRAPHQL_URL = f"{base_url}/store/graphql"
+
+    session_manager = SessionManager()
+    rate_limiter = RateLimiter(
+        # Only the interleaving of the calls is tested, not the rate limits
+        {**config.RATE_LIMITS, "store": (float("inf"), float("inf"))},
+        config.RATE_LIMIT_MIN_RATIO,
+        config.RATE_LIMIT_DECREASE,
+        config.RATE_LIMIT_INCREASE,
+        config.RATE_LIMIT_MAX_RETRIES,
+        config.RATE_LIMIT_BACKOFF,
+        config.RATE_LIMIT_MAX_WAIT,
+    )
+    psn = PSN("stress", session_manager, rate_limiter)
+
+    problems = []
+    try:
+        for round_index in range(args.rounds):
+            requests, results = await run_round(psn, round_index, args.requests)
+            for n, (request, result) in enumerate(zip(requests, results)):
+                expected_type = OPERATIONS[n % len(OPERATIONS)][1]
+                problems += check_result(request, result, expected_type)
+            problems += check_cookies(upstreams, requests)
+            print(
+                f"Round {round_index + 1}: {len(requests)} concurrent calls checked, "
+                f"{coalesced_calls.values.get(('chihiro',), 0):.0f} coalesced so far"
+            )
+    finally:
+        await session_manager.close()
+        upstreams.stop()
+
+    for problem in problems[:20]:
+        print(problem)
+    if problems:
+        raise SystemExit(f"{len(problems)} calls leaked state into each other.")
+    print(f"No state leaked between {args.rounds * args.requests} calls.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,5 @@
+import re
+
 import discord
 from discord import Option
 from discord.ext import commands
@@ -6,6 +8,7 @@ from modules.custom_bot import Bot
 import config
 from modules.api.common import APIError
 from modules.api.psn import PSNRequest
+from modules.paginator import Paginator
 
 valid_regions = [
     "ar-AE",
@@ -121,6 +124,9 @@ valid_regionsShow = "\n".join([", ".join(sublist) for sublist in valid_regionsSh
 token_desc = "pdccws_p cookie"
 id_desc = "ID from psprices product_id command"
 region_desc = "For example 'en-US', check 'playstation.com'"
+ids_desc = "IDs from psprices product_id command, separated by commas or spaces"
+
+PRODUCT_IDS_SEPARATOR = re.compile(r"[\s,]+")
 
 
 class AvatarCog(commands.Cog):
@@ -154,7 +160,7 @@ class AvatarCog(commands.Cog):
         request = PSNRequest(pdccws_p=pdccws_p, region=region, product_id=product_id)
 
         try:
-            avatar_url = await config.Secrets.PSN_API.check(request)
+            avatar = await self.bot.psn_store.check_avatar(request)
         except APIError as e:
             embed_error = discord.Embed(
                 title=self.bot.get_text(ctx.author.id, "error_title"),
@@ -171,7 +177,7 @@ class AvatarCog(commands.Cog):
             color=discord.Color.blue(),
         )
         embed_success.set_footer(text=self.bot.get_text(ctx.author.id, "host2"))
-        embed_success.set_image(url=avatar_url)
+        embed_success.set_image(url=avatar.image_url)
         await ctx.respond(embed=embed_success, ephemeral=True)
 
     @avatar_commands.command(description="Adds the avatar you input into your cart.")
@@ -191,7 +197,7 @@ class AvatarCog(commands.Cog):
         request = PSNRequest(pdccws_p=pdccws_p, region=region, product_id=product_id)
 
         try:
-            await config.Secrets.PSN_API.add_to_cart(request)
+            await self.bot.psn_store.add_to_cart(request)
         except APIError as e:
             embed_error = discord.Embed(
                 title=self.bot.get_text(ctx.author.id, "error_title"),
@@ -228,7 +234,7 @@ class AvatarCog(commands.Cog):
         request = PSNRequest(pdccws_p=pdccws_p, region=region, product_id=product_id)
 
         try:
-            await config.Secrets.PSN_API.remove_from_cart(request)
+            await self.bot.psn_store.remove_from_cart(request)
         except APIError as e:
             embed_error = discord.Embed(
                 title=self.bot.get_text(ctx.author.id, "error_title"),
@@ -247,6 +253,162 @@ class AvatarCog(commands.Cog):
         embed_success.set_footer(text=self.bot.get_text(ctx.author.id, "host2"))
         await ctx.respond(embed=embed_success, ephemeral=True)
 
+    async def bulk_requests(
+        self,
+        ctx: discord.ApplicationContext,
+        pdccws_p: str,
+        product_ids: str,
+        region: str,
+    ) -> list[PSNRequest] | None:
+        """
+        Builds one request per product ID, without duplicates.
+
+        Returns:
+            list[PSNRequest] | None: The requests, or None if an error was already sent to the user.
+        """
+        if region not in valid_regions:
+            await ctx.respond(embed=self.invalid_region, ephemeral=True)
+            return None
+
+        product_ids = list(
+            dict.fromkeys(filter(None, PRODUCT_IDS_SEPARATOR.split(product_ids)))
+        )
+        if not product_ids or len(product_ids) > config.AVATAR_BULK_MAX:
+            embed_error = discord.Embed(
+                title=self.bot.get_text(ctx.author.id, "error_title"),
+                description=(
+                    self.bot.get_text(
+                        ctx.author.id,
+                        "bulk_too_many_products",
+                        max=config.AVATAR_BULK_MAX,
+                    )
+                    if product_ids
+                    else self.bot.get_text(ctx.author.id, "bulk_no_products")
+                ),
+                color=discord.Color.red(),
+            )
+            embed_error.set_footer(text=self.bot.get_text(ctx.author.id, "host2"))
+            await ctx.respond(embed=embed_error, ephemeral=True)
+            return None
+
+        return [
+            PSNRequest(pdccws_p=pdccws_p, region=region, product_id=product_id)
+            for product_id in product_ids
+        ]
+
+    async def send_bulk_results(
+        self,
+        ctx: discord.ApplicationContext,
+        requests: list[PSNRequest],
+        results: list,
+        success_text: str,
+    ) -> None:
+        """
+        Sends one line per product ID, paginated when there are too many of them for one embed.
+        """
+        lines = [
+            (
+                f"✅ `{request.product_id}` {success_text}"
+                if not isinstance(result, APIError)
+                else f"❌ `{request.product_id}` {result}"
+            )
+            for request, result in zip(requests, results)
+        ]
+        succeeded = sum(not isinstance(result, APIError) for result in results)
+        summary = self.bot.get_text(
+            ctx.author.id,
+            "bulk_results_summary",
+            succeeded=succeeded,
+            total=len(results),
+        )
+        page_count = -(-len(lines) // config.AVATAR_BULK_PER_PAGE)
+
+        async def get_page(index: int) -> discord.Embed:
+            start = index * config.AVATAR_BULK_PER_PAGE
+            embed = discord.Embed(
+                title=self.bot.get_text(ctx.author.id, "bulk_results_title"),
+                description="\n".join(
+                    lines[start : start + config.AVATAR_BULK_PER_PAGE]
+                ),
+                color=discord.Color.blue() if succeeded else discord.Color.red(),
+            )
+            embed.set_footer(
+                text=f"{summary} • {index + 1}/{page_count} • {self.bot.get_text(ctx.author.id, 'host2')}"
+            )
+            return embed
+
+        if page_count > 1:
+            view = Paginator(ctx.author.id, page_count, get_page)
+            await ctx.respond(embed=await get_page(0), view=view, ephemeral=True)
+        else:
+            await ctx.respond(embed=await get_page(0), ephemeral=True)
+
+    @avatar_commands.command(
+        name="check-many", description="Checks many avatars at once for you."
+    )
+    async def check_many(
+        self,
+        ctx: discord.ApplicationContext,
+        pdccws_p: Option(str, description=token_desc),  # type: ignore
+        product_ids: Option(str, description=ids_desc),  # type: ignore
+        region: Option(str, description=region_desc),  # type: ignore
+    ) -> None:
+        await ctx.respond(self.bot.get_text(ctx.author.id, "checking"), ephemeral=True)
+
+        requests = await self.bulk_requests(ctx, pdccws_p, product_ids, region)
+        if requests is None:
+            return
+
+        results = await self.bot.psn_store.check_avatars(requests)
+        await self.send_bulk_results(
+            ctx, requests, results, self.bot.get_text(ctx.author.id, "avatar_found")
+        )
+
+    @avatar_commands.command(
+        name="add-many", description="Adds many avatars into your cart at once."
+    )
+    async def add_many(
+        self,
+        ctx: discord.ApplicationContext,
+        pdccws_p: Option(str, description=token_desc),  # type: ignore
+        product_ids: Option(str, description=ids_desc),  # type: ignore
+        region: Option(str, description=region_desc),  # type: ignore
+    ) -> None:
+        await ctx.respond(self.bot.get_text(ctx.author.id, "adding"), ephemeral=True)
+
+        requests = await self.bulk_requests(ctx, pdccws_p, product_ids, region)
+        if requests is None:
+            return
+
+        results = await self.bot.psn_store.add_many_to_cart(requests)
+        await self.send_bulk_results(
+            ctx, requests, results, self.bot.get_text(ctx.author.id, "added_to_cart")
+        )
+
+    @avatar_commands.command(
+        name="remove-many", description="Removes many avatars from your cart at once."
+    )
+    async def remove_many(
+        self,
+        ctx: discord.ApplicationContext,
+        pdccws_p: Option(str, description=token_desc),  # type: ignore
+        product_ids: Option(str, description=ids_desc),  # type: ignore
+        region: Option(str, description=region_desc),  # type: ignore
+    ) -> None:
+        await ctx.respond(self.bot.get_text(ctx.author.id, "removing"), ephemeral=True)
+
+        requests = await self.bulk_requests(ctx, pdccws_p, product_ids, region)
+        if requests is None:
+            return
+
+        results = await self.bot.psn_store.remove_many_from_cart(requests)
+        await self.send_bulk_results(
+            ctx,
+            requests,
+            results,
+            self.bot.get_text(ctx.author.id, "removed_from_cart"),
+        )
+
 
 def setup(bot):
     bot.add_cog(AvatarCog(bot))
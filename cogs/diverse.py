@@ -1,8 +1,9 @@
+import asyncio
+
 import discord
 from discord.ext import commands
 
 from modules.custom_bot import Bot
-import json
 import config
 
 
@@ -63,6 +64,7 @@ class Diverse(commands.Cog):
         ctx: discord.ApplicationContext,
         member: discord.User,
         private: bool = False,
+        hours: int = None,
     ):
         await ctx.defer(ephemeral=private)
 
@@ -72,10 +74,8 @@ class Diverse(commands.Cog):
             )
             raise discord.ApplicationCommandError(error_message)
 
-        if str(member.id) in self.bot.banned_user:
-            self.bot.banned_user.remove(str(member.id))
-            with open(config.BANNED_USERS, "w") as f:
-                json.dump(self.bot.banned_user, f)
+        if member.id in self.bot.bans:
+            await self.bot.bans.unban(member.id)
 
             response_message = self.bot.get_text(
                 ctx.author.id, "toggle_ban_unbanned", member=member.name
@@ -84,13 +84,19 @@ class Diverse(commands.Cog):
             print(f"{member.global_name} ({member.id}) was successfully unbanned.")
             return
 
-        self.bot.banned_user.append(str(member.id))
-        with open(config.BANNED_USERS, "w") as f:
-            json.dump(self.bot.banned_user, f)
+        expires_at = await self.bot.bans.ban(member.id, hours * 3600 if hours else None)
 
-        response_message = self.bot.get_text(
-            ctx.author.id, "toggle_ban_banned", member=member.name
-        )
+        if expires_at is None:
+            response_message = self.bot.get_text(
+                ctx.author.id, "toggle_ban_banned", member=member.name
+            )
+        else:
+            response_message = self.bot.get_text(
+                ctx.author.id,
+                "toggle_ban_banned_until",
+                member=member.name,
+                expires=f"<t:{int(expires_at)}:R>",
+            )
         await ctx.respond(response_message)
         print(f"{member.global_name} ({member.id}) was successfully banned.")
 
@@ -99,10 +105,10 @@ class Diverse(commands.Cog):
     )
     @commands.is_owner()
     async def refresh_token(self, ctx: discord.ApplicationContext):
-        self.bot.psnawp._request_builder.authenticator.obtain_fresh_access_token()
+        accepted = await self.bot.psn_client.refresh_credentials()
         response_message = self.bot.get_text(ctx.author.id, "refresh_token_success")
         await ctx.respond(response_message)
-        print("Generated a new NPSSO token.")
+        print(f"Generated new access tokens for {accepted} NPSSO token(s).")
 
     @discord.slash_command(
         name="change-language",
@@ -111,7 +117,7 @@ class Diverse(commands.Cog):
     async def change_lang(self, ctx: discord.ApplicationContext):
         options = [
             discord.SelectOption(label=lang, description=f"Select {lang}")
-            for lang in self.bot.langs.keys()
+            for lang in self.bot.translations.languages.keys()
         ]
 
         class LanguageSelect(discord.ui.Select):
@@ -131,9 +137,9 @@ class Diverse(commands.Cog):
                     return
 
                 selected_language = self.values[0]
-                self.bot.user_langs[str(self.user_id)] = selected_language
-                with open(config.USER_LANGUAGES, "w") as json_file:
-                    json.dump(self.bot.user_langs, json_file)
+                await asyncio.to_thread(
+                    self.bot.storage.set_language, self.user_id, selected_language
+                )
 
                 await interaction.response.send_message(
                     self.bot.get_text(
@@ -1,19 +1,20 @@
+import asyncio
 import base64
-import io
-import json
-from datetime import datetime, timedelta
-from urllib.request import urlopen
+from datetime import datetime
 
 import discord
 import pycountry
-from colorthief import ColorThief
 from discord.ext import commands
 import psnawp_api.core.psnawp_exceptions as psn_exceptions
 from psnawp_api.models.trophies.trophy_summary import TrophySummary
 
 import config
 from modules.custom_bot import Bot
-from modules.date_formatter import translate_date
+from modules.cache import TTLCache
+from modules.date_formatter import format_duration
+from modules.paginator import Paginator
+from modules.title_summary import summarize_titles
+from modules.translations import Translator
 
 
 class Field:
@@ -32,18 +33,16 @@ class Field:
 
 
 class Trophy:
-    def __init__(self, trophy_infos: TrophySummary, user_id: int, bot):
+    def __init__(self, trophy_infos: TrophySummary, texts: Translator):
         """
         A class representing a collection of trophies and their formatted display fields.
 
         Args:
             trophy_infos (TrophySummary): Summary information about the trophies.
-            user_id (int): The user's ID for language preference.
-            bot (object): The bot instance to access dynamic text.
+            texts (Translator): The texts in the language of the user.
         """
         self.trophy_infos = trophy_infos
-        self.user_id = user_id
-        self.bot = bot
+        self.texts = texts
         self.trophy_fields = self.format_trophies()
 
     def format_trophies(self):
@@ -54,18 +53,10 @@ class Trophy:
             list: A list of Field instances representing the formatted trophy information.
         """
         trophy_amounts = {
-            self.bot.get_text(
-                self.user_id, "bronze"
-            ): self.trophy_infos.earned_trophies.bronze,
-            self.bot.get_text(
-                self.user_id, "silver"
-            ): self.trophy_infos.earned_trophies.silver,
-            self.bot.get_text(
-                self.user_id, "gold"
-            ): self.trophy_infos.earned_trophies.gold,
-            self.bot.get_text(
-                self.user_id, "platinum"
-            ): self.trophy_infos.earned_trophies.platinum,
+            self.texts("bronze"): self.trophy_infos.earned_trophies.bronze,
+            self.texts("silver"): self.trophy_infos.earned_trophies.silver,
+            self.texts("gold"): self.trophy_infos.earned_trophies.gold,
+            self.texts("platinum"): self.trophy_infos.earned_trophies.platinum,
         }
 
         trophy_fields = []
@@ -75,11 +66,11 @@ class Trophy:
         trophy_fields.extend(
             [
                 Field(
-                    self.bot.get_text(self.user_id, "level_progress"),
+                    self.texts("level_progress"),
                     f"`{self.trophy_infos.trophy_level}` | `{self.trophy_infos.progress}%`",
                 ),
                 Field(
-                    self.bot.get_text(self.user_id, "total"),
+                    self.texts("total"),
                     f"`{sum(trophy_amounts.values())}`",
                 ),
             ]
@@ -92,6 +83,9 @@ class PSNCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot: Bot = bot
+        self.game_search_sessions = TTLCache(
+            config.GAME_SEARCH_SESSIONS, config.GAME_SEARCH_SESSION_TTL
+        )
 
     @discord.slash_command(
         name="user-search",
@@ -115,38 +109,65 @@ class PSNCog(commands.Cog):
         )  # This will prevent the command from timing out
 
         await self.register_usage(ctx.author.id)
+        texts = self.bot.translator(ctx.author.id)
 
         if account_id and online_id:
-            raise ValueError(
-                self.bot.get_text(ctx.author.id, "psn_user_argument_conflict")
-            )
+            raise ValueError(texts("psn_user_argument_conflict"))
         elif online_id is None and account_id is None:
-            raise ValueError(self.bot.get_text(ctx.author.id, "psn_missing_argument"))
+            raise ValueError(texts("psn_missing_argument"))
         elif online_id is not None:
-            user = self.bot.psnawp.user(online_id=online_id)
+            user = await self.bot.psn_client.user(online_id=online_id)
             account_id = user.account_id
-        elif account_id is not None:
-            user = self.bot.psnawp.user(account_id=account_id)
 
-        user_profile = user.profile()
-        user_friendship = user.friendship()
+        # Paging through the title stats takes the longest, so it starts as soon as the account ID is known
+        user_titles_task = asyncio.create_task(
+            summarize_titles(
+                self.bot.psn_client.title_stats_pages(
+                    account_id, config.TITLE_STATS_MAX_PAGES
+                ),
+                config.MAX_GAMES_DISPLAY,
+            )
+        )
+        try:
+            if online_id is None:
+                user = await self.bot.psn_client.user(account_id=account_id)
+
+            # The lookups are independent, so they all run at the same time
+            (
+                user_profile,
+                user_friendship,
+                trophy_infos,
+                user_presence,
+                user_titles,
+            ) = await asyncio.gather(
+                self.bot.psn_client.profile(account_id),
+                self.bot.psn_client.friendship(account_id),
+                self.bot.psn_client.trophy_summary(account_id),
+                self.bot.psn_client.presence(account_id),
+                user_titles_task,
+                return_exceptions=True,
+            )
+        except BaseException:
+            user_titles_task.cancel()
+            raise
+        for result in (user_profile, user_friendship):
+            if isinstance(result, Exception):
+                raise result
+
         user_language: list[str] = user_profile["languages"]
         user_region = user_language[0].split("-")[1]
         user_avatar = user_profile["avatars"][1]["url"]
 
-        try:
-            user_avatar_primary_color = await self.get_url_primary_color(user_avatar)
-        except Exception:  # Because colorthief doesn't have custom exceptions
-            user_avatar_primary_color = discord.Color.blue()
+        user_avatar_primary_color = await self.get_url_primary_color(user_avatar)
 
         embed = discord.Embed(
-            title=self.bot.get_text(ctx.author.id, "psn_user_title"),
+            title=texts("psn_user_title"),
             color=user_avatar_primary_color,
             timestamp=datetime.now(),
         )
 
         embed.set_author(
-            name=self.bot.get_text(ctx.author.id, "psn_user_account"),
+            name=texts("psn_user_account"),
             icon_url=config.PSN_ACCOUNT_ICON_URL,
         )
 
@@ -157,20 +178,20 @@ class PSNCog(commands.Cog):
         """
         embed.set_image(url=image_url)
 
-        footer_text = self.bot.get_text(
-            ctx.author.id,
+        footer_text = texts(
             "psn_user_viewcount",
-            exec_amount=self.bot.users_json[str(ctx.author.id)],
-        )
-        embed.set_footer(
-            text=f"{footer_text} | {self.bot.get_text(ctx.author.id, 'host')}"
+            exec_amount=self.bot.usage.get(ctx.author.id),
         )
+        embed.set_footer(text=f"{footer_text} | {texts('host')}")
 
         fields = self.set_embed_fields(
-            ctx.author,
+            texts,
             user,
             user_profile,
             user_friendship,
+            trophy_infos,
+            user_presence,
+            user_titles,
             user_region,
             user_avatar_primary_color,
         )
@@ -188,36 +209,23 @@ class PSNCog(commands.Cog):
         Args:
             user_id (int): The ID of the user to register
         """
-        user_id = str(user_id)
-
-        if self.bot.users_json.get(user_id) is not None:
-            self.bot.users_json[user_id] += 1
-        else:
-            self.bot.users_json[user_id] = 1
-
-        with open(config.CACHE_USERS, "w") as json_file:
-            json.dump(self.bot.users_json, json_file)
+        self.bot.usage.increment(user_id)
 
     async def get_url_primary_color(self, url: str) -> discord.Color:
         """
-        Get the primary color of an image from a URL.
+        Get the primary color of an image from a URL, falling back to blue if it takes too long.
         """
-        fd = urlopen(url)
-        image = io.BytesIO(fd.read())
-
-        color_thief = ColorThief(image)
-        primary_color = color_thief.get_color(quality=15)
-
-        return discord.Color.from_rgb(
-            r=primary_color[0], g=primary_color[1], b=primary_color[2]
-        )
+        return await self.bot.avatar_colors.get_color(url)
 
     def set_embed_fields(
         self,
-        author,
+        texts,
         user,
         user_profile,
         user_friendship,
+        trophy_infos,
+        user_presence,
+        user_titles,
         user_region,
         user_avatar_color,
     ) -> list[Field]:
@@ -225,77 +233,78 @@ class PSNCog(commands.Cog):
         Sets the embed fields with user information.
 
         Args:
+            texts (Translator): The texts in the language of the author.
             user (object): The user object containing user details.
             user_profile (dict): The user's profile information.
             user_friendship (dict): The user's friendship information.
+            trophy_infos (TrophySummary | Exception): The user's trophy summary, or the error raised while fetching it.
+            user_presence (dict | Exception): The user's presence, or the error raised while fetching it.
+            user_titles (TitleSummary | Exception): The summary of the user's played titles, or the error raised while fetching them.
             user_region (str): The user's region code.
             user_avatar_color (str): The user's avatar color.
 
         Returns:
             list[Field]: A list of Field objects with the user's information.
         """
-        user_id = author.id
         fields = [
             Field(
-                self.bot.get_text(user_id, "profile_primary_color"),
+                texts("profile_primary_color"),
                 f"`{str(user_avatar_color).upper()}`",
                 False,
             ),
-            Field(self.bot.get_text(user_id, "online_id"), f"`{user.online_id}`"),
+            Field(texts("online_id"), f"`{user.online_id}`"),
             Field(
-                self.bot.get_text(user_id, "ps_plus"),
+                texts("ps_plus"),
                 f"{'`✅`' if user_profile['isPlus'] else '`❌`'}",
             ),
             Field(
-                self.bot.get_text(user_id, "officially_verified"),
+                texts("officially_verified"),
                 f"{'`✅`' if user_profile['isOfficiallyVerified'] else '`❌`'}",
             ),
-            Field(self.bot.get_text(user_id, "account_id"), f"`{user.account_id}`"),
+            Field(texts("account_id"), f"`{user.account_id}`"),
             Field(
-                self.bot.get_text(user_id, "hex"),
+                texts("hex"),
                 f"`{(f'{int(user.account_id):016x}'.upper())}`",
             ),
             Field(
-                self.bot.get_text(user_id, "base64"),
+                texts("base64"),
                 f"`{base64.b64encode(int(user.account_id).to_bytes(8, 'little')).decode('ascii').upper()}`",
             ),
             Field(
-                self.bot.get_text(user_id, "social"),
-                f"{self.bot.get_text(user_id, 'friends')}: `{user_friendship['friendsCount'] if user_friendship['friendsCount'] >= 0 else self.bot.get_text(user_id, 'private')}`",
+                texts("social"),
+                f"{texts('friends')}: `{user_friendship['friendsCount'] if user_friendship['friendsCount'] >= 0 else texts('private')}`",
                 False,
             ),
         ]
 
         try:
             user_region_field = Field(
-                self.bot.get_text(
-                    user_id, "region_flag", flag=f":flag_{user_region.lower()}:"
-                ),
+                texts("region_flag", flag=f":flag_{user_region.lower()}:"),
                 f"`{user_region}` | `{pycountry.countries.get(alpha_2=user_region).name}`",
             )
         except AttributeError:
             user_region_field = Field(
-                self.bot.get_text(user_id, "region_unknown"),
-                f"`{self.bot.get_text(user_id, 'private')}`",
+                texts("region_unknown"),
+                f"`{texts('private')}`",
             )
 
         fields.insert(2, user_region_field)
 
-        self.get_trophy_info(author, user, fields)
-        self.get_user_presence(author, user, fields)
-        self.get_titles(author, user, fields)
+        self.get_trophy_info(texts, trophy_infos, fields)
+        self.get_user_presence(texts, user_presence, fields)
+        self.get_titles(texts, user_titles, fields)
 
         fields.append(
             Field(
-                self.bot.get_text(user_id, "about_me"),
-                f"```{user_profile['aboutMe'] if user_profile['aboutMe'] else self.bot.get_text(user_id, 'not_visible')}```",
+                texts("about_me"),
+                f"```{user_profile['aboutMe'] if user_profile['aboutMe'] else texts('not_visible')}```",
                 False,
             )
         )
 
         fields.append(
             Field(
-                self.bot.get_text(user_id, "previous_online_id"),
+                texts("previous_online_id"),
                 f"`{user.prev_online_id}`",
                 False,
             ),
@@ -303,48 +312,50 @@ class PSNCog(commands.Cog):
 
         return fields
 
-    def get_trophy_info(self, author, user, fields):
+    def get_trophy_info(self, texts, trophy_infos, fields):
         """
         Gets the user's trophy information and appends it to the fields.
 
         Args:
-            user (object): The user object containing user details.
+            trophy_infos (TrophySummary | Exception): The user's trophy summary, or the error raised while fetching it.
             fields (list[Field]): A list of Field objects to append the trophy information to.
         """
-        user_id = author.id
         try:
-            trophy_infos = user.trophy_summary()
-            trophies = Trophy(trophy_infos, user_id, self.bot)
+            if isinstance(trophy_infos, Exception):
+                raise trophy_infos
+            trophies = Trophy(trophy_infos, texts)
             fields.extend(trophies.trophy_fields)
         except Exception:
             fields.append(
                 Field(
-                    self.bot.get_text(user_id, "trophies"),
-                    f"`{self.bot.get_text(user_id, 'private')}`",
+                    texts("trophies"),
+                    f"`{texts('private')}`",
                 )
             )
 
-    def get_user_presence(self, author, user, fields):
+    def get_user_presence(self, texts, user_presence, fields):
         """
         Gets the user's presence information and appends it to the fields.
 
         Args:
-            user (object): The user object containing user details.
+            user_presence (dict | Exception): The user's presence, or the error raised while fetching it.
             fields (list[Field]): A list of Field objects to append the presence information to.
         """
         try:
-            user_presence = user.get_presence()["basicPresence"]
+            if isinstance(user_presence, Exception):
+                raise user_presence
+            user_presence = user_presence["basicPresence"]
             user_presence_info = user_presence["primaryPlatformInfo"]
 
             current_game = self.extract_current_game(user_presence)
             self.process_presence_status(
-                author, user_presence, user_presence_info, current_game, fields
+                texts, user_presence, user_presence_info, current_game, fields
             )
         except Exception:
             fields.append(
                 Field(
-                    self.bot.get_text(author.id, "user_presence"),
-                    f"`{self.bot.get_text(author.id, 'private')}`",
+                    texts("user_presence"),
+                    f"`{texts('private')}`",
                 )
             )
 
@@ -364,7 +375,7 @@ class PSNCog(commands.Cog):
         return None
 
     def process_presence_status(
-        self, author, user_presence, user_presence_info, current_game, fields
+        self, texts, user_presence, user_presence_info, current_game, fields
     ):
         """
         Processes the user's presence status and appends it to the fields.
@@ -375,18 +386,18 @@ class PSNCog(commands.Cog):
             fields (list[Field]): A list of Field objects to append the presence status information to.
         """
         if user_presence_info["onlineStatus"] == "offline":
-            self.process_offline_status(author, user_presence_info, fields)
+            self.process_offline_status(texts, user_presence_info, fields)
         else:
             self.process_online_status(
-                author, user_presence, user_presence_info, current_game, fields
+                texts, user_presence, user_presence_info, current_game, fields
             )
 
-    def process_offline_status(self, author, user_presence_info, fields):
+    def process_offline_status(self, texts, user_presence_info, fields):
         """
         Processes the user's offline status and appends it to the fields.
 
         Args:
-            author (discord.User): The author (user) invoking the command.
+            texts (Translator): The texts in the language of the author.
             user_presence_info (dict): The user's primary platform presence information.
             fields (list[Field]): A list of Field objects to append the offline status information to.
         """
@@ -396,160 +407,107 @@ class PSNCog(commands.Cog):
             )
             presence_data = f"<t:{int(last_online.timestamp())}:R> {user_presence_info['platform'].upper()}"
         except KeyError:
-            presence_data = self.bot.get_text(author.id, "console_absent")
-        fields.append(
-            Field(self.bot.get_text(author.id, "last_seen"), presence_data, False)
-        )
+            presence_data = texts("console_absent")
+        fields.append(Field(texts("last_seen"), presence_data, False))
 
     def process_online_status(
-        self, author, user_presence, user_presence_info, current_game, fields
+        self, texts, user_presence, user_presence_info, current_game, fields
     ):
         """
         Processes the user's online status and appends it to the fields.
 
         Args:
-            author (discord.User): The author (user) invoking the command.
+            texts (Translator): The texts in the language of the author.
             user_presence_info (dict): The user's primary platform presence information.
             current_game (str): The name of the current game the user is playing, or None if not playing any game.
             fields (list[Field]): A list of Field objects to append the online status information to.
         """
-        presence_data = f"`{self.bot.get_text(author.id, 'currently_online')}` {user_presence_info['platform'].upper()}"
-        fields.append(
-            Field(self.bot.get_text(author.id, "last_seen"), presence_data, False)
+        presence_data = (
+            f"`{texts('currently_online')}` {user_presence_info['platform'].upper()}"
         )
+        fields.append(Field(texts("last_seen"), presence_data, False))
 
         availability: str = user_presence["availability"]
-        availability = availability.replace(
-            "unavailable", self.bot.get_text(author.id, "unavailable")
-        )
-        availability = availability.replace(
-            "availableToPlay", self.bot.get_text(author.id, "ready_to_play")
-        )
+        availability = availability.replace("unavailable", texts("unavailable"))
+        availability = availability.replace("availableToPlay", texts("ready_to_play"))
 
-        fields.append(
-            Field(self.bot.get_text(author.id, "availability"), availability, False)
-        )
+        fields.append(Field(texts("availability"), availability, False))
 
         if current_game:
-            fields.append(
-                Field(
-                    self.bot.get_text(author.id, "playing"), f"`{current_game}`", False
-                )
-            )
+            fields.append(Field(texts("playing"), f"`{current_game}`", False))
 
-    def get_titles(self, author, user, fields):
+    def get_titles(self, texts, title_summary, fields):
         """
         Gets the user's recent and favorite titles and appends them to the fields.
 
         Args:
-            user (object): The user object containing user details.
+            title_summary (TitleSummary | Exception): The user's played titles, or the error raised while fetching them.
             fields (list[Field]): A list of Field objects to append the titles to.
         """
-        user_id = author.id
         try:
-            all_titles = user.title_stats()
-
-            # Process recent games
-            recent_titles = []
-            for i, title in enumerate(all_titles):
-                if i == config.MAX_GAMES_DISPLAY:
-                    break
-
-                launched_text = self.bot.get_text(
-                    user_id,
-                    "launched",
-                    timestamp=int(title.last_played_date_time.timestamp()),
-                )
-                played_times_text = self.bot.get_text(
-                    user_id, "played_times", play_count=title.play_count
-                )
-                played_duration_text = self.bot.get_text(
-                    user_id,
-                    "played_duration",
-                    play_duration=translate_date(
-                        str(title.play_duration), user_id, self.bot
-                    ),
-                )
-
-                recent_titles.append(
-                    f"{title.name}\n"
-                    f"{launched_text}\n"
-                    f"{played_times_text}\n"
-                    f"{played_duration_text}"
-                )
+            if isinstance(title_summary, Exception):
+                raise title_summary
 
             fields.append(
                 Field(
-                    self.bot.get_text(user_id, "recent_games"),
-                    "\n\n".join(recent_titles),
-                )
-            )
-
-            total_playtime = timedelta(seconds=0)
-            all_favorite_titles = []
-            for title in all_titles:
-                total_playtime += title.play_duration
-                all_favorite_titles.append(title)
-
-            total_games = len(all_favorite_titles)
-            all_favorite_titles = sorted(
-                all_favorite_titles, key=lambda x: x.play_duration, reverse=True
-            )
-
-            favorite_titles = []
-            for i, title in enumerate(all_favorite_titles):
-                if i == config.MAX_GAMES_DISPLAY:
-                    break
-
-                launched_text = self.bot.get_text(
-                    user_id,
-                    "launched",
-                    timestamp=int(title.last_played_date_time.timestamp()),
-                )
-                played_times_text = self.bot.get_text(
-                    user_id, "played_times", play_count=title.play_count
-                )
-                played_duration_text = self.bot.get_text(
-                    user_id,
-                    "played_duration",
-                    play_duration=translate_date(
-                        str(title.play_duration), user_id, self.bot
+                    texts("recent_games"),
+                    "\n\n".join(
+                        self.format_title(texts, title)
+                        for title in title_summary.recent
                     ),
                 )
-
-                favorite_titles.append(
-                    f"{title.name}\n"
-                    f"{launched_text}\n"
-                    f"{played_times_text}\n"
-                    f"{played_duration_text}"
-                )
-
-            fields.append(
-                Field(
-                    self.bot.get_text(user_id, "favorite_games"),
-                    "\n\n".join(favorite_titles),
-                )
             )
-
             fields.append(
                 Field(
-                    self.bot.get_text(user_id, "total_play_time"),
-                    f"`{translate_date(str(total_playtime), user_id, self.bot)}`",
-                    inline=False,
+                    texts("favorite_games"),
+                    "\n\n".join(
+                        self.format_title(texts, title)
+                        for title in title_summary.favorites
+                    ),
                 )
             )
 
+            total_play_time = (
+                f"`{format_duration(title_summary.total_playtime, texts)}`"
+            )
+            if title_summary.partial:
+                total_play_time += (
+                    f" {texts('partial_totals', count=title_summary.counted_games)}"
+                )
             fields.append(
-                Field(self.bot.get_text(user_id, "total_games"), f"`{total_games}`")
+                Field(texts("total_play_time"), total_play_time, inline=False)
             )
+
+            fields.append(Field(texts("total_games"), f"`{title_summary.total_games}`"))
         except Exception:
             fields.append(
                 Field(
-                    self.bot.get_text(user_id, "games"),
-                    f"`{self.bot.get_text(user_id, 'private')}`",
+                    texts("games"),
+                    f"`{texts('private')}`",
                 )
             )
 
+    def format_title(self, texts, title) -> str:
+        """
+        Formats a title with its last launch, play count and play duration.
+        """
+        launched_text = texts(
+            "launched",
+            timestamp=int(title.last_played_date_time.timestamp()),
+        )
+        played_times_text = texts("played_times", play_count=title.play_count)
+        played_duration_text = texts(
+            "played_duration",
+            play_duration=format_duration(title.play_duration, texts),
+        )
+
+        return (
+            f"{title.name}\n"
+            f"{launched_text}\n"
+            f"{played_times_text}\n"
+            f"{played_duration_text}"
+        )
+
     @discord.slash_command(
         name="game-search",
         description="Allows you to look up a game on the Playstation Store.",
@@ -566,45 +524,83 @@ class PSNCog(commands.Cog):
         search_index: int = 0,
     ):
         await ctx.defer()
-
-        game_search = self.bot.igdb.search_game(game_name, limit=100)
+        texts = self.bot.translator(ctx.author.id)
+
+        # The light list of results is kept for a while, so paging or searching again doesn't refetch it
+        session_key = (ctx.author.id, game_name.lower())
+        game_search = self.game_search_sessions.get(session_key)
+        if game_search is None:
+            game_search = await self.bot.igdb.search_game_ids(
+                game_name, limit=config.GAME_SEARCH_RESULTS
+            )
+            self.game_search_sessions.set(session_key, game_search)
 
         if game_search == []:
-            await ctx.respond(self.bot.get_text(ctx.author.id, "no_games"))
+            await ctx.respond(texts("no_games"))
             return
 
-        if search_index >= len(game_search):
-            search_index = len(game_search) - 1
-        game = game_search[search_index]
+        search_index = min(max(search_index, 0), len(game_search) - 1)
+
+        async def get_page(index: int) -> discord.Embed:
+            game_id, _ = game_search[index]
+            game = await self.bot.igdb.get_game(game_id)
+            if game is None:
+                return discord.Embed(description=texts("no_games"))
+            return self.build_game_embed(texts, game, index, len(game_search))
+
+        view = Paginator(
+            ctx.author.id,
+            len(game_search),
+            get_page,
+            index=search_index,
+            timeout=config.GAME_SEARCH_SESSION_TTL,
+        )
+        await ctx.respond(
+            ctx.author.mention, embed=await get_page(search_index), view=view
+        )
+        print(f"Obtained data for {game_name}")
+
+    def build_game_embed(self, texts: Translator, game, index: int, total: int):
+        """
+        Builds the embed displaying a game of the search results.
 
+        Args:
+            texts (Translator): The texts in the language of the user who searched the game.
+            game (Game): The game to display.
+            index (int): The index of the game in the search results.
+            total (int): The amount of search results.
+
+        Returns:
+            discord.Embed: The embed of the game.
+        """
         embed = discord.Embed(
             title=f"{game.name} ({game.release_date.strftime('%Y-%m-%d') if game.release_date else 'TBA'})",
-            description=f"{game.description[: config.MAX_DESC_LENGTH] if game.description else self.bot.get_text(ctx.author.id, 'no_desc')}...[({self.bot.get_text(ctx.author.id, 'read_more')})]({game.url})",
+            description=f"{game.description[: config.MAX_DESC_LENGTH] if game.description else texts('no_desc')}...[({texts('read_more')})]({game.url})",
             timestamp=datetime.now(),
         )
 
         embed.add_field(
-            name=self.bot.get_text(ctx.author.id, "publishers"),
+            name=texts("publishers"),
             value=", ".join(game.publishers),
             inline=False,
         )
         embed.add_field(
-            name=self.bot.get_text(ctx.author.id, "platforms"),
+            name=texts("platforms"),
             value=", ".join(game.platforms),
             inline=False,
         )
         embed.add_field(
-            name=self.bot.get_text(ctx.author.id, "genres"),
+            name=texts("genres"),
             value=", ".join([genre for genre in game.genres[: config.MAX_TAGS]]),
             inline=False,
         )
         embed.add_field(
-            name=self.bot.get_text(ctx.author.id, "keywords"),
+            name=texts("keywords"),
             value=", ".join([keyword for keyword in game.keywords[: config.MAX_TAGS]]),
             inline=False,
         )
         embed.add_field(
-            name=self.bot.get_text(ctx.author.id, "media"),
+            name=texts("media"),
             value="\n".join(
                 [
                     f"{name}: {' | '.join([f'[{name} n°{i}]({url})' for i, url in enumerate(url_list[: config.MAX_MEDIAS_URL])])}"
@@ -614,7 +610,7 @@ class PSNCog(commands.Cog):
             inline=False,
         )
         embed.add_field(
-            name=self.bot.get_text(ctx.author.id, "similar_games"),
+            name=texts("similar_games"),
             value=", ".join(game.similar_games[: config.MAX_TAGS]),
             inline=False,
         )
@@ -623,11 +619,10 @@ class PSNCog(commands.Cog):
             embed.set_image(url=game.medias["artworks"][0])
 
         embed.set_footer(
-            text=f"{self.bot.get_text(ctx.author.id, 'score')}: {int(game.rating) if game.rating else self.bot.get_text(ctx.author.id, 'no_ratings')} | {self.bot.get_text(ctx.author.id, 'showing_result', current=search_index+1, total=len(game_search))} | {self.bot.get_text(ctx.author.id, 'host')}"
+            text=f"{texts('score')}: {int(game.rating) if game.rating else texts('no_ratings')} | {texts('showing_result', current=index+1, total=total)} | {texts('host')}"
         )
 
-        await ctx.respond(ctx.author.mention, embed=embed)
-        print(f"Obtained data for {game_name}")
+        return embed
 
     @discord.slash_command(
         name="list-recent-games",
@@ -635,67 +630,116 @@ class PSNCog(commands.Cog):
     )
     async def list_recent_games(self, ctx: discord.ApplicationContext, online_id: str):
         await ctx.defer()
-        user = self.bot.psnawp.user(online_id=online_id)
+        texts = self.bot.translator(ctx.author.id)
+        user = await self.bot.psn_client.user(online_id=online_id)
 
-        recent_games_iterator = user.title_stats()
+        recent_games_iterator = await self.bot.psn_client.title_stats(
+            user.account_id, limit=config.MAX_RECENT_DISPLAY
+        )
         embed = discord.Embed(
-            title=f"{self.bot.get_text(ctx.author.id, 'recent_games')} {online_id}",
+            title=f"{texts('recent_games')} {online_id}",
             color=discord.Color.red(),
         )
-        embed.set_footer(text=self.bot.get_text(ctx.author.id, "host"))
+        embed.set_footer(text=texts("host"))
+
+        # Every title is enriched at the same time, a failing or slow lookup only loses its own data
+        game_names = list(dict.fromkeys(game.name for game in recent_games_iterator))
+        semaphore = asyncio.Semaphore(config.RECENT_GAMES_ENRICH_CONCURRENCY)
+        game_medias, game_searches = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    self.run_enrichment(semaphore, self.get_game_medias(name), [])
+                    for name in game_names
+                )
+            ),
+            # IGDB resolves all the titles in a single request
+            self.run_enrichment(
+                semaphore,
+                self.bot.igdb.search_games(game_names, limit=1),
+                {},
+            ),
+        )
+        game_medias = dict(zip(game_names, game_medias))
 
         for i, game in enumerate(recent_games_iterator):
             if i >= config.MAX_RECENT_DISPLAY:
                 break
 
-            search_results = self.bot.psnawp.search(
-                game.name, "MobileUniversalSearchGame", limit=1
-            )
-            search_results = [r for r in search_results]
-            media_texts = []
-
-            if search_results:
-                game_media = search_results[0]["result"]["media"]
-
-                for j, media in enumerate(game_media):
-                    if j >= config.MAX_MEDIA_PER_GAMES:
-                        break
-                    if media["role"] == "MASTER":
-                        continue
-
-                    media_texts.append(f"[{media['role']}]({media['url']})")
-
-            game_search = self.bot.igdb.search_game(game.name, limit=1)
+            media_texts = game_medias[game.name]
+            game_search = game_searches.get(game.name)
 
             if game_search:
                 game_result = game_search[0]
                 game_description = (
                     game_result.description
                     if game_result.description
-                    else self.bot.get_text(ctx.author.id, "no_desc")
+                    else texts("no_desc")
                 )
+            elif game_search is None:
+                game_description = texts("no_desc")
             else:
-                game_description = self.bot.get_text(ctx.author.id, "no_games")
+                game_description = texts("no_games")
 
-            play_time = str(game.play_duration)
             embed.add_field(
                 name=game.name,
                 value=(
-                    f"{self.bot.get_text(ctx.author.id, 'description')}: {game_description[:config.MAX_SHORT_DESC_LENGTH]}...\n"
-                    f"{self.bot.get_text(ctx.author.id, 'category')}: {game.category.name}\n"
-                    f"{self.bot.get_text(ctx.author.id, 'game_id')}: {game.title_id}\n"
-                    f"{self.bot.get_text(ctx.author.id, 'play_count')}: {game.play_count}\n"
-                    f"{self.bot.get_text(ctx.author.id, 'first_played')}: <t:{int(game.first_played_date_time.timestamp())}:R>\n"
-                    f"{self.bot.get_text(ctx.author.id, 'last_played')}: <t:{int(game.last_played_date_time.timestamp())}:R>\n"
-                    f"{self.bot.get_text(ctx.author.id, 'play_duration')}: {translate_date(play_time, ctx.author.id, self.bot)}\n"
-                    f"[{self.bot.get_text(ctx.author.id, 'game_icon')}]({game.image_url})\n"
-                    f"{self.bot.get_text(ctx.author.id, 'media')}: {' | '.join(media_texts)}"
+                    f"{texts('description')}: {game_description[:config.MAX_SHORT_DESC_LENGTH]}...\n"
+                    f"{texts('category')}: {game.category.name}\n"
+                    f"{texts('game_id')}: {game.title_id}\n"
+                    f"{texts('play_count')}: {game.play_count}\n"
+                    f"{texts('first_played')}: <t:{int(game.first_played_date_time.timestamp())}:R>\n"
+                    f"{texts('last_played')}: <t:{int(game.last_played_date_time.timestamp())}:R>\n"
+                    f"{texts('play_duration')}: {format_duration(game.play_duration, texts)}\n"
+                    f"[{texts('game_icon')}]({game.image_url})\n"
+                    f"{texts('media')}: {' | '.join(media_texts)}"
                 ),
                 inline=False,
             )
 
         await ctx.respond(embed=embed)
 
+    async def run_enrichment(self, semaphore: asyncio.Semaphore, coroutine, default):
+        """
+        Runs an enrichment lookup under the concurrency limit and its own timeout.
+
+        Args:
+            semaphore (asyncio.Semaphore): The semaphore limiting the concurrent lookups.
+            coroutine (Coroutine): The lookup to run.
+            default (Any): The value returned if the lookup fails or is too slow.
+        """
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    coroutine, config.RECENT_GAMES_ENRICH_TIMEOUT
+                )
+            except Exception:
+                return default
+
+    async def get_game_medias(self, game_name: str) -> list[str]:
+        """
+        Gets the store medias of a game as markdown links.
+
+        Args:
+            game_name (str): The name of the game to look for.
+        """
+        search_results = await self.bot.psn_search.universal_search(
+            game_name, "MobileUniversalSearchGame"
+        )
+        media_texts = []
+
+        if search_results:
+            game_media = search_results[0]["result"]["media"]
+
+            for j, media in enumerate(game_media):
+                if j >= config.MAX_MEDIA_PER_GAMES:
+                    break
+                if media["role"] == "MASTER":
+                    continue
+
+                media_texts.append(f"[{media['role']}]({media['url']})")
+
+        return media_texts
+
 
 def setup(bot):
     bot.add_cog(PSNCog(bot))
@@ -12,41 +12,147 @@ DELAY = 5
 # Set the channels ID in which the commands can be used (leave empty for everywhere)
 CORRECT_CHANNELS = []
 
-# File in which to store the user who used the command and the amount of time they did it
-CACHE_USERS = "./cache/users.json"
+# SQLite file in which to store the usage counts, the banned users and the language of each user
+DATABASE = "./cache/bot.db"
+USAGE_FLUSH_INTERVAL = 60  # Seconds between each write of the usage counts
+USAGE_FLUSH_EVERY = 50  # Amount of users changed after which the usage counts are written right away
+DEFAULT_LANGUAGE = "English"  # Name of the language file used by the users who didn't choose one
+LANGUAGE_RELOAD_INTERVAL = 60  # Seconds before a language changed by another bot process is seen
+BAN_SWEEP_INTERVAL = 60  # Seconds between each removal of the expired bans
 
-# File in which to store the banned users who cannot execute commands
+# Files used before the database, imported into it the first time it is opened
+CACHE_USERS = "./cache/users.json"
 BANNED_USERS = "./cache/bans.json"
-
-# File in which to store the different languages settings for each users
 USER_LANGUAGES = "./cache/langs.json"
 
+# File in which to store the primary color of the avatars already seen
+AVATAR_COLORS_CACHE = "./cache/avatar_colors.json"
+
+# SQLite file in which to store the IGDB search results
+IGDB_CACHE = "./cache/igdb.db"
+
 # IN ORDER: BRONZE, SILVER, GOLD, PLATINIUM
 TROPHY_TEXTS = ["🥉 Bronze", "🥈 Silver", "🥇 Gold", "💎 Platinium"]
 
 # This is the icon displayed before the title of the embed
 PSN_ACCOUNT_ICON_URL = "https://lachaisesirv.sirv.com/icons8-playstation-144%20(1).png"
 
+# The amount of formatted play durations kept in memory
+DURATION_CACHE_SIZE = 4096
+
 # The amount of games to display in the user-profile command
 MAX_GAMES_DISPLAY = 1
 
+# IGDB API :
+IGDB_REQUESTS_PER_SECOND = 4  # Documented rate limit of IGDB
+IGDB_TOKEN_REFRESH_MARGIN = 5 * 60  # Seconds before its expiration at which the token is renewed
+
+# IGDB search results cache :
+IGDB_CACHE_FRESH_TTL = 7 * 24 * 60 * 60  # Seconds before a result is refreshed in the background
+IGDB_CACHE_MAX_AGE = 90 * 24 * 60 * 60  # Seconds after which a result is not served anymore
+IGDB_CACHE_MAX_BYTES = 64 * 1024 * 1024
+IGDB_CACHE_WARM_ENTRIES = 1000  # Most recently used results loaded in memory at startup
+
 # In the game-search command :
 MAX_DESC_LENGTH = 360
 MAX_TAGS = 8
 MAX_MEDIAS_URL = 4
+GAME_SEARCH_RESULTS = 100  # Amount of results which can be browsed
+GAME_SEARCH_SESSION_TTL = 5 * 60  # Seconds during which the results of a search are kept
+GAME_SEARCH_SESSIONS = 1000  # Maximum amount of searches kept at the same time
 
 # In the recent-games command :
 MAX_RECENT_DISPLAY = 8
 MAX_MEDIA_PER_GAMES = 3
 MAX_SHORT_DESC_LENGTH = 200
+RECENT_GAMES_ENRICH_CONCURRENCY = 8  # Store/IGDB lookups running at the same time
+RECENT_GAMES_ENRICH_TIMEOUT = 5  # Seconds given to each lookup
+
+# Amount of threads used to run the blocking PSNAWP calls
+PSN_EXECUTOR_WORKERS = 16
+
+# Maximum amount of PSNAWP calls running at the same time in the whole process
+PSN_MAX_CONCURRENCY = 8
+
+# Shared HTTP connection pool :
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_CONNECTIONS_PER_HOST = 30
+HTTP_DNS_CACHE_TTL = 5 * 60  # Seconds during which resolved hosts are reused
+HTTP_KEEPALIVE_TIMEOUT = 60  # Seconds an idle connection is kept open
+HTTP_TIMEOUT = 30  # Seconds before a request is abandoned
+
+# Shared rate limiter, as (requests per second, burst) for each family of endpoints.
+# These are ceilings : a family is slowed down when it is answered 429, then given its rate back while its requests succeed.
+RATE_LIMITS = {
+    "psn_auth": (1, 2),  # Access token refreshes
+    "psn_profile": (40, 40),  # Profiles, friendships and presences
+    "psn_trophies": (20, 20),
+    "psn_games": (20, 20),  # Title stats
+    "psn_search": (20, 20),  # Universal search
+    "store": (20, 20),  # Avatar containers and carts
+    "igdb": (IGDB_REQUESTS_PER_SECOND, IGDB_REQUESTS_PER_SECOND),
+}
+RATE_LIMIT_MIN_RATIO = 0.1  # Lowest share of its rate a family can be slowed down to
+RATE_LIMIT_DECREASE = 0.5  # Rate multiplier applied on a 429
+RATE_LIMIT_INCREASE = 1  # Requests per second given back for every second of successful requests
+RATE_LIMIT_MAX_RETRIES = 3  # Retries of a request answered 429
+RATE_LIMIT_BACKOFF = 0.5  # Base delay in seconds of the backoff when no Retry-After is given
+RATE_LIMIT_MAX_WAIT = 20  # Longest pause in seconds a command waits for before the user is asked to retry later
+
+# Delay in seconds before asking PSNAWP for a fresh access token again
+PSN_ACCESS_TOKEN_TTL = 600
+
+# Amount of titles requested per page when listing the played games of an user
+TITLE_STATS_PAGE_SIZE = 200
+# Maximum amount of pages read for the totals of the user-search command (None to read them all)
+TITLE_STATS_MAX_PAGES = None
+# Amount of title stats pages fetched ahead of the one being read
+TITLE_STATS_PREFETCH_PAGES = 4
+
+# Lifetime in seconds of the cached PSN data, for each kind of data
+PSN_CACHE_TTLS = {
+    "account_id": 24 * 60 * 60,  # online ID -> account ID
+    "user": 24 * 60 * 60,
+    "profile": 10 * 60,
+    "friendship": 10 * 60,
+    "trophy_summary": 15 * 60,
+    "title_stats": 15 * 60,
+    "presence": 30,
+}
+
+# Maximum amount of entries kept in memory for each kind of cached PSN data
+PSN_CACHE_MAX_ENTRIES = 2048
+
+# Avatar primary color extraction :
+AVATAR_COLOR_WORKERS = 2
+AVATAR_COLOR_THUMBNAIL_SIZE = 64  # Size in pixels of the image given to ColorThief
+AVATAR_COLOR_TIMEOUT = 3  # Seconds before falling back to the default color
+AVATAR_COLOR_MAX_ENTRIES = 4096  # Colors kept in memory
+AVATAR_COLOR_DISK_MAX_ENTRIES = 50000  # Colors kept in the file
+AVATAR_COLOR_SAVE_EVERY = 20  # New colors before the file is written again
+
+# In the avatar commands :
+AVATAR_CACHE_TTL = 24 * 60 * 60  # Seconds during which a resolved avatar SKU is reused
+AVATAR_CACHE_NEGATIVE_TTL = 10 * 60  # Seconds during which an invalid product ID is remembered
+AVATAR_CACHE_MAX_ENTRIES = 10000
+AVATAR_BULK_MAX = 50  # Maximum amount of product IDs given to a bulk command
+AVATAR_BULK_CONCURRENCY = 10  # Product IDs resolved at the same time
+AVATAR_BULK_PER_PAGE = 10  # Results displayed on each page
 
 # In the bot-info command :
 ALLOW_SERVER_INVITES = True
 
+# Prometheus metrics, served at http://METRICS_HOST:METRICS_PORT/metrics :
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108  # None to disable the endpoint
+LOOP_LAG_INTERVAL = 5  # Seconds between each measure of the event loop lag
+
 
 # API KEYS
 class Secrets:
     PSN_API = ""
+    # NPSSO tokens of other service accounts, the PSN requests are spread over all the accounts
+    PSN_API_POOL = []
     BOT_TOKEN = (
         ""
     )
@@ -13,6 +13,14 @@ bot = Bot(psn_api_token=config.Secrets.PSN_API, intents=intents, command_prefix=
 async def on_ready():
     print("Ready!")
     bot.presence_updater.start()
+    if not bot.usage_flusher.is_running():
+        bot.usage_flusher.start()
+    if not bot.ban_sweeper.is_running():
+        bot.ban_sweeper.start()
+    if not bot.language_reloader.is_running():
+        bot.language_reloader.start()
+    if not bot.loop_lag_monitor.is_running():
+        bot.loop_lag_monitor.start()
 
 
 for file in os.listdir("cogs"):
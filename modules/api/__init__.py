@@ -1,3 +1,12 @@
 from .common import APIError
-from .psn import PSN, PSNOperation, PSNRequest, USERNAME_PATTERN
-from .psprices import PSPrices, DECIMAL_RE
\ No newline at end of file
+from .session import SessionManager
+from .psn import (
+    PSN,
+    PSNOperation,
+    PSNRequest,
+    PSNHTTPRequest,
+    AvatarInfo,
+    CartResult,
+    USERNAME_PATTERN,
+)
+from .psprices import PSPrices, DECIMAL_RE
@@ -1,14 +1,23 @@
+import asyncio
 import re
 from dataclasses import dataclass
 from enum import Enum
+from types import MappingProxyType
+from typing import Any, Mapping
 
-import aiohttp
-from psnawp_api import PSNAWP
-
+import config
+from modules import metrics
 from modules.api.common import APIError
+from modules.api.session import SessionManager
+from modules.cache import TTLCache
+from modules.rate_limit import RateLimiter
+from modules.single_flight import SingleFlight
 
 USERNAME_PATTERN = re.compile(r"^[a-zA-Z0-9_-]+$")
 
+STORE_URL = "https://store.playstation.com/store/api/chihiro/00_09_000/container"
+GRAPHQL_URL = "https://web.np.playstation.com/api/graphql/v1/op"
+
 
 class PSNOperation(Enum):
     CHECK_AVATAR = 1
@@ -16,142 +25,311 @@ class PSNOperation(Enum):
     REMOVE_FROM_CART = 3
 
 
-@dataclass
+@dataclass(frozen=True)
 class PSNRequest:
     pdccws_p: str
     region: str
     product_id: str
 
 
+@dataclass(frozen=True)
+class PSNHTTPRequest:
+    "Everything needed to send one request to the store, built from scratch for every call."
+
+    method: str
+    url: str
+    headers: Mapping[str, str]
+    json: Mapping[str, Any] | None = None
+
+
+@dataclass(frozen=True)
+class AvatarInfo:
+    product_id: str
+    sku_id: str
+    image_url: str
+    name: str | None = None
+
+
+@dataclass(frozen=True)
+class CartResult:
+    product_id: str
+    sku_id: str
+
+
 class PSN:
-    def __init__(self, npsso: str):
-        self.secret = npsso
-        self.psnawp = PSNAWP(self.secret)
+    "Stateless client of the store endpoints: one instance can be shared by any amount of concurrent commands."
 
-        # for request
-        self.url = ""
-        self.headers = {}
-        self.data_json = {}
+    def __init__(
+        self, npsso: str, session_manager: SessionManager, rate_limiter: RateLimiter
+    ):
+        self.secret = npsso
+        self.session_manager = session_manager
+        self.rate_limiter = rate_limiter
 
-        # for response
-        self.res = {}
+        # (region, product_id) -> AvatarInfo, or the APIError of a product the store doesn't know
+        self.avatar_cache = TTLCache(
+            config.AVATAR_CACHE_MAX_ENTRIES, config.AVATAR_CACHE_TTL
+        )
+        # Concurrent checks of the same product with the same cookie share one container request
+        self.in_flight = SingleFlight("chihiro")
 
     @staticmethod
     def validate_request(req: PSNRequest):
         if req.product_id.count("-") != 2:
             raise APIError("Invalid product ID!")
 
-    def get_error_cause(self) -> str:
-        return self.res.get("cause")
+    @staticmethod
+    def get_error_cause(res: dict) -> str:
+        return res.get("cause") if isinstance(res, dict) else None
 
-    def get_error(self) -> str | None:
-        if "subTotalPrice" in str(self.res):
+    @staticmethod
+    def is_unknown_product(status: int, res: dict) -> bool:
+        """
+        Whether the store answered that the product doesn't exist or has nothing to buy,
+        rather than a session, throttling or server error which may not happen on the next try.
+        """
+        if status == 404:
+            return True
+        return status == 200 and isinstance(res, dict) and "name" in res
+
+    @staticmethod
+    def get_error(res: dict) -> str | None:
+        if "subTotalPrice" in str(res):
             return None
 
-        elif self.res.get("errors"):
-            return self.res["errors"][0]["message"]
+        elif res.get("errors"):
+            return res["errors"][0]["message"]
         return None
 
-    def request_builder(self, request: PSNRequest, operation: PSNOperation) -> None:
+    @staticmethod
+    def get_container_url(request: PSNRequest) -> str:
+        return f"{STORE_URL}/{request.region.replace('-', '/')}/19/{request.product_id}"
+
+    def get_headers(self, request: PSNRequest) -> Mapping[str, str]:
+        return MappingProxyType(
+            {
+                "Origin": "https://checkout.playstation.com",
+                "content-type": "application/json",
+                "Accept-Language": request.region,
+                "Cookie": f"AKA_A2=A; pdccws_p={request.pdccws_p}; isSignedIn=true; userinfo={self.secret}; p=0; gpdcTg=%5B1%5D",
+            }
+        )
+
+    def request_builder(
+        self,
+        request: PSNRequest,
+        operation: PSNOperation,
+        sku_ids: tuple[str, ...] = (),
+    ) -> PSNHTTPRequest:
         match operation:
             case PSNOperation.CHECK_AVATAR:
-                self.url = f"https://store.playstation.com/store/api/chihiro/00_09_000/container/{request.region.replace('-', '/')}/19/{request.product_id}/"
-                self.headers = {
-                    "Origin": "https://checkout.playstation.com",
-                    "content-type": "application/json",
-                    "Accept-Language": request.region,
-                    "Cookie": f"AKA_A2=A; pdccws_p={request.pdccws_p}; isSignedIn=true; userinfo={self.secret}; p=0; gpdcTg=%5B1%5D",
-                }
+                return PSNHTTPRequest(
+                    "GET",
+                    f"{self.get_container_url(request)}/",
+                    self.get_headers(request),
+                )
 
             case PSNOperation.ADD_TO_CART:
-                self.url = "https://web.np.playstation.com/api/graphql/v1/op"
-                self.headers = {
-                    "Origin": "https://checkout.playstation.com",
-                    "content-type": "application/json",
-                    "Accept-Language": request.region,
-                    "Cookie": f"AKA_A2=A; pdccws_p={request.pdccws_p}; isSignedIn=true; userinfo={self.secret}; p=0; gpdcTg=%5B1%5D",
-                }
-                self.data_json = {
-                    "operationName": "addToCart",
-                    "variables": {"skus": [{"skuId": ""}]},
-                    "extensions": {
-                        "persistedQuery": {
-                            "version": 1,
-                            "sha256Hash": "93eb198753e06cba3a30ed3a6cd3abc1f1214c11031ffc5b0a5ca6d08c77061f",
-                        }
+                return PSNHTTPRequest(
+                    "POST",
+                    GRAPHQL_URL,
+                    self.get_headers(request),
+                    {
+                        "operationName": "addToCart",
+                        "variables": {
+                            "skus": [{"skuId": sku_id} for sku_id in sku_ids]
+                        },
+                        "extensions": {
+                            "persistedQuery": {
+                                "version": 1,
+                                "sha256Hash": "93eb198753e06cba3a30ed3a6cd3abc1f1214c11031ffc5b0a5ca6d08c77061f",
+                            }
+                        },
                     },
-                }
+                )
 
             case PSNOperation.REMOVE_FROM_CART:
-                self.url = "https://web.np.playstation.com/api/graphql/v1/op"
-                self.headers = {
-                    "Origin": "https://checkout.playstation.com",
-                    "content-type": "application/json",
-                    "Accept-Language": request.region,
-                    "Cookie": f"AKA_A2=A; pdccws_p={request.pdccws_p}; isSignedIn=true; userinfo={self.secret}; p=0; gpdcTg=%5B1%5D",
-                }
-                self.data_json = {
-                    "operationName": "removeFromCart",
-                    "variables": {"skuId": ""},
-                    "extensions": {
-                        "persistedQuery": {
-                            "version": 1,
-                            "sha256Hash": "55e50c2157c33e84f409d2a52f3bb7c19db62b144fb49e75a1a9b0acad276bba",
-                        }
+                return PSNHTTPRequest(
+                    "POST",
+                    GRAPHQL_URL,
+                    self.get_headers(request),
+                    {
+                        "operationName": "removeFromCart",
+                        "variables": {"skuId": sku_ids[0]},
+                        "extensions": {
+                            "persistedQuery": {
+                                "version": 1,
+                                "sha256Hash": "55e50c2157c33e84f409d2a52f3bb7c19db62b144fb49e75a1a9b0acad276bba",
+                            }
+                        },
                     },
-                }
+                )
+
+    async def send(self, http_request: PSNHTTPRequest) -> dict:
+        return (await self.send_for_status(http_request))[1]
 
-    def insert_skuId_deep(self, skuId: str) -> None:
-        self.data_json["variables"]["skus"][0]["skuId"] = skuId
+    async def send_for_status(self, http_request: PSNHTTPRequest) -> tuple[int, dict]:
+        # The containers are read from chihiro, the cart is changed through GraphQL
+        if http_request.json is None:
+            upstream, operation = "chihiro", "container"
+        else:
+            upstream, operation = "graphql", http_request.json["operationName"]
 
-    def insert_skuId(self, sku_Id: str) -> None:
-        self.data_json["variables"]["skuId"] = sku_Id
+        throttled_attempts = 0
+        while True:
+            await self.rate_limiter.acquire("store")
+            with metrics.upstream_latency.time(upstream, operation):
+                async with self.session_manager.get().request(
+                    http_request.method,
+                    http_request.url,
+                    headers=dict(http_request.headers),
+                    json=http_request.json,
+                ) as response:
+                    if response.status == 429:
+                        self.rate_limiter.throttled(
+                            "store",
+                            response.headers.get("Retry-After"),
+                            throttled_attempts,
+                        )
+                        throttled_attempts += 1
+                        continue
+                    self.rate_limiter.succeeded("store")
+                    return response.status, await response.json(content_type=None)
 
-    async def check_avatar(
-        self, request: PSNRequest, obtain_skuget_only: bool = False
-    ) -> str:
+    async def check_avatar(self, request: PSNRequest) -> AvatarInfo:
+        """
+        Resolves the SKU of an avatar from its container, which is cached as it almost never changes.
+        Invalid product IDs are remembered for a shorter time.
+        """
         self.validate_request(request)
-        self.request_builder(request, PSNOperation.CHECK_AVATAR)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.url, headers=self.headers) as response:
-                self.res = await response.json()
+        cache_key = (request.region, request.product_id)
+        cached = self.avatar_cache.get(cache_key)
+        if isinstance(cached, APIError):
+            raise APIError(cached.message)
+        if cached is not None:
+            return cached
 
-        sku_get = self.res.get("default_sku", {}).get("id")
-        if sku_get is None:
-            raise APIError(self.get_error_cause())
-        if obtain_skuget_only:
-            return sku_get
+        # The answer depends on the cookie until it is cached, so other users never share it
+        return await self.in_flight.run(
+            (*cache_key, request.pdccws_p),
+            lambda: self.resolve_avatar(request, cache_key),
+        )
 
-        picture_avatar = f"https://store.playstation.com/store/api/chihiro/00_09_000/container/{request.region.replace('-', '/')}/19/{request.product_id}/image"
-        return picture_avatar
+    async def resolve_avatar(self, request: PSNRequest, cache_key: tuple) -> AvatarInfo:
+        status, res = await self.send_for_status(
+            self.request_builder(request, PSNOperation.CHECK_AVATAR)
+        )
 
-    async def add_to_cart(self, request: PSNRequest) -> None:
-        sku_id = await self.check_avatar(request, obtain_skuget_only=True)
-        self.request_builder(request, PSNOperation.ADD_TO_CART)
-        self.insert_skuId_deep(sku_id)
+        sku_id = res.get("default_sku", {}).get("id") if isinstance(res, dict) else None
+        if sku_id is None:
+            error = APIError(self.get_error_cause(res))
+            # The other errors depend on the cookie or are transient, so they aren't shared
+            if self.is_unknown_product(status, res):
+                self.avatar_cache.set(
+                    cache_key, error, config.AVATAR_CACHE_NEGATIVE_TTL
+                )
+            raise error
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.url, headers=self.headers, json=self.data_json
-            ) as response:
-                self.res = await response.json()
+        avatar = AvatarInfo(
+            request.product_id,
+            sku_id,
+            f"{self.get_container_url(request)}/image",
+            res.get("name"),
+        )
+        self.avatar_cache.set(cache_key, avatar)
+        return avatar
 
-        err = self.get_error()
+    async def add_to_cart(self, request: PSNRequest) -> CartResult:
+        avatar = await self.check_avatar(request)
+        res = await self.send(
+            self.request_builder(request, PSNOperation.ADD_TO_CART, (avatar.sku_id,))
+        )
+
+        err = self.get_error(res)
         if err is not None:
             raise APIError(err)
+        return CartResult(request.product_id, avatar.sku_id)
 
-    async def remove_from_cart(self, request: PSNRequest) -> None:
-        sku_id = await self.check_avatar(request, obtain_skuget_only=True)
-        self.request_builder(request, PSNOperation.REMOVE_FROM_CART)
-        self.insert_skuId(sku_id)
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.url, headers=self.headers, json=self.data_json
-            ) as response:
-                self.res = await response.json()
+    async def remove_from_cart(self, request: PSNRequest) -> CartResult:
+        avatar = await self.check_avatar(request)
+        res = await self.send(
+            self.request_builder(
+                request, PSNOperation.REMOVE_FROM_CART, (avatar.sku_id,)
+            )
+        )
 
-        err = self.get_error()
+        err = self.get_error(res)
         if err is not None:
             raise APIError(err)
+        return CartResult(request.product_id, avatar.sku_id)
+
+    async def check_avatars(
+        self, requests: list[PSNRequest]
+    ) -> list[AvatarInfo | APIError]:
+        """
+        Resolves many avatars concurrently.
+
+        Returns:
+            list[AvatarInfo | APIError]: The avatar, or the error raised, for each request.
+        """
+        semaphore = asyncio.Semaphore(config.AVATAR_BULK_CONCURRENCY)
+
+        async def check(request: PSNRequest) -> AvatarInfo | APIError:
+            async with semaphore:
+                try:
+                    return await self.check_avatar(request)
+                except APIError as e:
+                    return e
+
+        return await asyncio.gather(*(check(request) for request in requests))
+
+    async def add_many_to_cart(
+        self, requests: list[PSNRequest]
+    ) -> list[CartResult | APIError]:
+        """
+        Adds many avatars to the same cart with a single addToCart call, once all their SKUs are resolved.
+
+        Returns:
+            list[CartResult | APIError]: The result, or the error raised, for each request.
+        """
+        avatars = await self.check_avatars(requests)
+        sku_ids = tuple(
+            avatar.sku_id for avatar in avatars if isinstance(avatar, AvatarInfo)
+        )
+        if not sku_ids:
+            return avatars
+
+        res = await self.send(
+            self.request_builder(requests[0], PSNOperation.ADD_TO_CART, sku_ids)
+        )
+        err = self.get_error(res)
+
+        return [
+            (
+                (APIError(err) if err else CartResult(avatar.product_id, avatar.sku_id))
+                if isinstance(avatar, AvatarInfo)
+                else avatar
+            )
+            for avatar in avatars
+        ]
+
+    async def remove_many_from_cart(
+        self, requests: list[PSNRequest]
+    ) -> list[CartResult | APIError]:
+        """
+        Removes many avatars concurrently, as removeFromCart only accepts one SKU.
+
+        Returns:
+            list[CartResult | APIError]: The result, or the error raised, for each request.
+        """
+        semaphore = asyncio.Semaphore(config.AVATAR_BULK_CONCURRENCY)
+
+        async def remove(request: PSNRequest) -> CartResult | APIError:
+            async with semaphore:
+                try:
+                    return await self.remove_from_cart(request)
+                except APIError as e:
+                    return e
+
+        return await asyncio.gather(*(remove(request) for request in requests))
@@ -1,12 +1,13 @@
-import aiohttp
 import re
-from modules.api import APIError
+from modules.api.common import APIError
+from modules.api.session import SessionManager
 
 DECIMAL_RE = re.compile(r"\d+")
 
 
 class PSPrices:
-    def __init__(self, url: str) -> None:
+    def __init__(self, url: str, session_manager: SessionManager) -> None:
+        self.session_manager = session_manager
         match = DECIMAL_RE.search(url)
 
         if not match:
@@ -20,11 +21,9 @@ class PSPrices:
     }
 
     async def obtain_skuid(self) -> str:
-        async with aiohttp.ClientSession() as session:
-            res = await session.get(
-                self.url, allow_redirects=True, headers=self.HEADERS
-            )
-
+        async with self.session_manager.get().get(
+            self.url, allow_redirects=True, headers=self.HEADERS
+        ) as res:
             # product_id = url.split("productId=")[1].split("&")[0]
             product_id = res.url.query.get("productId", "FAIL!")
             if product_id == "FAIL!":
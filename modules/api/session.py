@@ -0,0 +1,28 @@
+import aiohttp
+
+import config
+
+
+class SessionManager:
+    "Owns the aiohttp session shared by every HTTP client of the bot, so connections are pooled and kept alive."
+
+    def __init__(self) -> None:
+        self.session: aiohttp.ClientSession | None = None
+
+    def get(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.HTTP_MAX_CONNECTIONS,
+                limit_per_host=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT),
+            )
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
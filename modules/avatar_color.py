@@ -0,0 +1,141 @@
+import asyncio
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import discord
+from colorthief import ColorThief
+from PIL import Image
+
+import config
+from . import metrics
+from .api.session import SessionManager
+from .cache import TTLCache
+
+
+def get_dominant_color(image_bytes: bytes) -> tuple[int, int, int]:
+    """
+    Downscales the image to a small thumbnail before running ColorThief on it,
+    which gives the same dominant color for a fraction of the quantization cost.
+    """
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    image.thumbnail(
+        (config.AVATAR_COLOR_THUMBNAIL_SIZE, config.AVATAR_COLOR_THUMBNAIL_SIZE)
+    )
+
+    thumbnail = io.BytesIO()
+    image.save(thumbnail, "PNG")
+    thumbnail.seek(0)
+
+    return ColorThief(thumbnail).get_color(quality=1)
+
+
+class AvatarColors:
+    def __init__(self, session_manager: SessionManager):
+        """
+        Extracts and memoizes the primary color of avatars, first in memory, then in a file kept across restarts.
+
+        Args:
+            session_manager (SessionManager): The owner of the shared aiohttp session.
+        """
+        self.session_manager = session_manager
+        self.memory = TTLCache(config.AVATAR_COLOR_MAX_ENTRIES)
+        self.pool = ThreadPoolExecutor(
+            max_workers=config.AVATAR_COLOR_WORKERS, thread_name_prefix="colorthief"
+        )
+
+        # Least recently used colors first, like in the file
+        self.disk: OrderedDict[str, int] = OrderedDict()
+        if os.path.exists(config.AVATAR_COLORS_CACHE):
+            with open(config.AVATAR_COLORS_CACHE, "r") as json_file:
+                self.disk.update(json.load(json_file))
+        while len(self.disk) > config.AVATAR_COLOR_DISK_MAX_ENTRIES:
+            self.disk.popitem(last=False)
+        self.unsaved_colors = 0
+        # A single save runs at a time, and the file is written under the lock
+        self.save_task: asyncio.Task | None = None
+        self.save_lock = threading.Lock()
+
+    async def get_color(self, url: str) -> discord.Color:
+        """
+        Gets the primary color of the image at the given URL.
+
+        Returns:
+            discord.Color: The primary color, or blue if it couldn't be obtained in time.
+        """
+        color_value = self.memory.get(url)
+        if color_value is None:
+            color_value = self.disk.get(url)
+        if url in self.disk:
+            self.disk.move_to_end(url)
+
+        if color_value is None:
+            try:
+                color_value = await asyncio.wait_for(
+                    self.compute_color(url), config.AVATAR_COLOR_TIMEOUT
+                )
+            except Exception:  # Because colorthief doesn't have custom exceptions
+                return discord.Color.blue()
+            self.remember(url, color_value)
+
+        self.memory.set(url, color_value)
+        return discord.Color(color_value)
+
+    async def compute_color(self, url: str) -> int:
+        with metrics.upstream_latency.time("psn", "avatar_image"):
+            async with self.session_manager.get().get(url) as response:
+                response.raise_for_status()
+                image_bytes = await response.read()
+
+        loop = asyncio.get_running_loop()
+        with metrics.upstream_latency.time("colorthief", "dominant_color"):
+            r, g, b = await loop.run_in_executor(
+                self.pool, get_dominant_color, image_bytes
+            )
+        return discord.Color.from_rgb(r, g, b).value
+
+    def remember(self, url: str, color_value: int):
+        self.disk[url] = color_value
+        self.disk.move_to_end(url)
+        while len(self.disk) > config.AVATAR_COLOR_DISK_MAX_ENTRIES:
+            self.disk.popitem(last=False)
+
+        self.unsaved_colors += 1
+        if self.unsaved_colors >= config.AVATAR_COLOR_SAVE_EVERY and (
+            self.save_task is None or self.save_task.done()
+        ):
+            self.save_task = asyncio.create_task(self.save_in_background())
+
+    async def save_in_background(self):
+        "Saves the colors without ever failing the command which found the last one."
+        unsaved_colors, self.unsaved_colors = self.unsaved_colors, 0
+        try:
+            await asyncio.to_thread(self.save, dict(self.disk))
+        except Exception as error:
+            self.unsaved_colors += unsaved_colors
+            print(f"Could not save the avatar colors: {error!r}")
+
+    def save(self, colors: dict[str, int]):
+        """
+        Writes the colors to the disk cache.
+        The file is replaced atomically so a crash can't leave it half written.
+        """
+        with self.save_lock:
+            temp_path = f"{config.AVATAR_COLORS_CACHE}.tmp"
+            with open(temp_path, "w") as json_file:
+                json.dump(colors, json_file)
+            os.replace(temp_path, config.AVATAR_COLORS_CACHE)
+
+    def close(self):
+        saving = self.save_task is not None and not self.save_task.done()
+        if saving:
+            self.save_task.cancel()
+        if self.unsaved_colors or saving:
+            try:
+                self.save(dict(self.disk))
+            except Exception as error:
+                print(f"Could not save the avatar colors: {error!r}")
+        self.pool.shutdown(wait=False, cancel_futures=True)
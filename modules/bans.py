@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from .storage import Storage
+
+
+class BanList:
+    def __init__(self, storage: Storage):
+        """
+        Banned users held in memory for constant-time checks, each change being written to the storage right away, in a thread.
+
+        Args:
+            storage (Storage): The storage in which the bans are kept.
+        """
+        self.storage = storage
+        # user_id -> timestamp at which the ban expires, or None if it is permanent
+        self.bans: dict[str, float | None] = storage.get_bans()
+        # Users banned or unbanned while a sweep reads the storage, whose state in memory is the latest one
+        self.changed: set[str] | None = None
+
+    def __contains__(self, user_id: int) -> bool:
+        user_id = str(user_id)
+        if user_id not in self.bans:
+            return False
+
+        expires_at = self.bans[user_id]
+        return expires_at is None or expires_at > time.time()
+
+    def __len__(self) -> int:
+        return len(self.bans)
+
+    async def ban(self, user_id: int, duration: float = None) -> float | None:
+        """
+        Bans a user, forever or for the given amount of seconds.
+
+        Returns:
+            float | None: The timestamp at which the ban expires, if it does.
+        """
+        expires_at = time.time() + duration if duration else None
+        await asyncio.to_thread(self.storage.ban, user_id, expires_at)
+        self.bans[str(user_id)] = expires_at
+        self.mark_changed(user_id)
+        return expires_at
+
+    async def unban(self, user_id: int):
+        await asyncio.to_thread(self.storage.unban, user_id)
+        self.bans.pop(str(user_id), None)
+        self.mark_changed(user_id)
+
+    def mark_changed(self, user_id: int):
+        if self.changed is not None:
+            self.changed.add(str(user_id))
+
+    async def sweep(self):
+        """
+        Deletes the expired bans, then reloads the others so the ones made by other bot processes are seen.
+        The storage is read in a thread, and the bans changed meanwhile are kept as they are in memory.
+        """
+        self.changed = set()
+        try:
+            bans = await asyncio.to_thread(self.reload)
+        finally:
+            changed, self.changed = self.changed, None
+
+        for user_id in changed:
+            if user_id in self.bans:
+                bans[user_id] = self.bans[user_id]
+            else:
+                bans.pop(user_id, None)
+        self.bans = bans
+
+    def reload(self) -> dict[str, float | None]:
+        self.storage.delete_expired_bans(time.time())
+        return self.storage.get_bans()
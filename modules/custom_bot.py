@@ -1,54 +1,112 @@
-import json
-import os
+import asyncio
+import math
+import time
 
 import discord
 from discord.ext import commands, tasks
 from psnawp_api import PSNAWP
 import config
 from itertools import cycle
+from . import metrics
 from .game_search import IGDB
+from .igdb_cache import IGDBCache
+from .psn_credentials import CredentialPool, authenticate
+from .psn_executor import PSNExecutor
+from .rate_limit import RateLimited, RateLimiter
+from .psn_cache import CachedPSNClient
+from .custom_psnawp import Search
+from .avatar_color import AvatarColors
+from .bans import BanList
+from .storage import Storage
+from .translations import Translations, Translator
+from .usage_store import UsageStore
+from .api import PSN, SessionManager
 
 
 class Bot(commands.Bot):
     def __init__(self, psn_api_token: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self.session_manager = SessionManager()
+        self.rate_limiter = RateLimiter(
+            config.RATE_LIMITS,
+            config.RATE_LIMIT_MIN_RATIO,
+            config.RATE_LIMIT_DECREASE,
+            config.RATE_LIMIT_INCREASE,
+            config.RATE_LIMIT_MAX_RETRIES,
+            config.RATE_LIMIT_BACKOFF,
+            config.RATE_LIMIT_MAX_WAIT,
+        )
         self.psnawp = PSNAWP(psn_api_token)
+        self.psn_executor = PSNExecutor(
+            config.PSN_EXECUTOR_WORKERS, config.PSN_MAX_CONCURRENCY
+        )
+        # The token given to the bot, then the extra ones of the pool
+        self.psn_credentials = CredentialPool(
+            [
+                self.psnawp._request_builder.authenticator,
+                *authenticate(config.Secrets.PSN_API_POOL),
+            ],
+            config.RATE_LIMIT_MAX_WAIT,
+        )
+        self.psn_client = CachedPSNClient(
+            self.psn_credentials,
+            self.psn_executor,
+            self.session_manager,
+            self.rate_limiter,
+        )
+        self.psn_search = Search(self.psn_client)
+        self.psn_store = PSN(psn_api_token, self.session_manager, self.rate_limiter)
+        self.avatar_colors = AvatarColors(self.session_manager)
         self.igdb = IGDB(
             config.Secrets.IGDB["client_id"],
             config.Secrets.IGDB["client_secret"],
+            IGDBCache(
+                config.IGDB_CACHE,
+                config.IGDB_CACHE_FRESH_TTL,
+                config.IGDB_CACHE_MAX_AGE,
+                config.IGDB_CACHE_MAX_BYTES,
+                config.IGDB_CACHE_WARM_ENTRIES,
+            ),
+            self.session_manager,
+            self.rate_limiter,
         )
         self.presence_iter = cycle(config.RICH_PRESENCES.keys())
 
-        if not os.path.exists(config.CACHE_USERS):
-            with open(config.CACHE_USERS, "w") as json_file:
-                json_file.write(json.dumps({}))
-
-        with open(config.CACHE_USERS, "r") as json_file:
-            self.users_json = json.load(json_file)
-
-        with open(config.BANNED_USERS, "r") as json_file:
-            self.banned_user = json.load(json_file)
-
-        self.langs = {}
-        for file in os.listdir("./langs"):
-            if not file.endswith(".json"):
-                continue
+        self.storage = Storage(config.DATABASE)
+        self.storage.migrate_json(
+            config.CACHE_USERS, config.BANNED_USERS, config.USER_LANGUAGES
+        )
+        self.usage = UsageStore(self.storage, config.USAGE_FLUSH_EVERY)
+        self.bans = BanList(self.storage)
 
-            full_path = f"./langs/{file}"
-            with open(full_path, "r") as json_file:
-                language_data: dict = json.load(json_file)
-                self.langs[language_data.get("lang-name")] = language_data.get("texts")
+        self.translations = Translations("./langs", config.DEFAULT_LANGUAGE)
 
-        with open(config.USER_LANGUAGES, "r") as json_file:
-            self.user_langs = json.load(json_file)
+        self.metrics_server = metrics.MetricsServer(
+            config.METRICS_HOST, config.METRICS_PORT
+        )
+        for kind, cache in self.psn_client.caches.items():
+            metrics.registry.track_cache(f"psn_{kind}", cache)
+        metrics.registry.track_cache("avatar_sku", self.psn_store.avatar_cache)
+        metrics.registry.track_cache("avatar_color", self.avatar_colors.memory)
+        metrics.registry.track_cache("igdb", self.igdb.cache.memory)
 
         self.before_invoke(self.__before_commands)
 
+    async def start(self, *args, **kwargs):
+        if config.METRICS_PORT is not None:
+            try:
+                await self.metrics_server.start()
+            except OSError as error:
+                # Likely another bot process of this host serving its metrics on the same port
+                print(f"The metrics endpoint could not be started: {error}")
+        await super().start(*args, **kwargs)
+
     async def __before_commands(self, ctx: discord.ApplicationContext):
+        ctx.started_at = time.perf_counter()
         print(f"{ctx.author.name} used {ctx.command.name}")
 
-        if str(ctx.author.id) in self.banned_user:
+        if ctx.author.id in self.bans:
             raise discord.ApplicationCommandError(
                 self.get_text(ctx.author.id, "user_banned_disclaimer")
             )
@@ -60,17 +118,53 @@ class Bot(commands.Bot):
                 self.get_text(ctx.author.id, "wrong_channel_error")
             )
 
+    def observe_command(self, ctx: discord.ApplicationContext):
+        # Commands stopped by a check never reach the before_invoke hook
+        started_at = getattr(ctx, "started_at", None)
+        if started_at is not None:
+            metrics.command_latency.observe(
+                time.perf_counter() - started_at, ctx.command.qualified_name
+            )
+
+    async def on_application_command_completion(self, ctx: discord.ApplicationContext):
+        self.observe_command(ctx)
+
     async def on_application_command_error(
         self, ctx: discord.ApplicationContext, error: discord.DiscordException
     ):
-        error_message = f"{ctx.author.mention}, `{error}`"
+        self.observe_command(ctx)
+        original = getattr(error, "original", error)
+        metrics.errors.inc("command", type(original).__name__)
+
+        if isinstance(original, RateLimited):
+            # Expected under load, so the user is only asked to come back later
+            error_message = f"{ctx.author.mention}, " + self.get_text(
+                ctx.author.id, "rate_limited", seconds=math.ceil(original.retry_after)
+            )
+        else:
+            error_message = f"{ctx.author.mention}, `{error}`"
 
         try:
             await ctx.respond(error_message)
         except Exception:
             await ctx.send(error_message)
 
-        raise error
+        if not isinstance(original, RateLimited):
+            raise error
+
+    async def close(self):
+        self.usage_flusher.cancel()
+        self.ban_sweeper.cancel()
+        self.language_reloader.cancel()
+        self.loop_lag_monitor.cancel()
+        await self.metrics_server.close()
+        await self.usage.flush()
+        self.storage.close()
+        self.avatar_colors.close()
+        self.igdb.close()
+        await self.session_manager.close()
+        self.psn_executor.shutdown()
+        await super().close()
 
     @tasks.loop(minutes=config.DELAY)
     async def presence_updater(self):
@@ -81,10 +175,31 @@ class Bot(commands.Bot):
             activity=discord.Activity(type=current_type, name=current_presence)
         )
 
+    @tasks.loop(seconds=config.USAGE_FLUSH_INTERVAL)
+    async def usage_flusher(self):
+        await self.usage.flush()
+
+    @tasks.loop(seconds=config.BAN_SWEEP_INTERVAL)
+    async def ban_sweeper(self):
+        await self.bans.sweep()
+
+    @tasks.loop(seconds=config.LANGUAGE_RELOAD_INTERVAL)
+    async def language_reloader(self):
+        await asyncio.to_thread(self.storage.reload_languages)
+
+    @tasks.loop(seconds=config.LOOP_LAG_INTERVAL)
+    async def loop_lag_monitor(self):
+        # The time before the loop gets back to a task yielding for nothing is the backlog of the other tasks
+        started_at = time.perf_counter()
+        await asyncio.sleep(0)
+        metrics.loop_lag.observe(time.perf_counter() - started_at)
+
     def get_user_language(self, user_id):
-        return self.user_langs.get(str(user_id), "English")
+        return self.storage.get_language(user_id) or config.DEFAULT_LANGUAGE
+
+    def translator(self, user_id) -> Translator:
+        "Resolves the language of a user once, for all the texts of a command."
+        return self.translations.translator(self.get_user_language(user_id))
 
     def get_text(self, user_id, key, **kwargs):
-        lang_name = self.get_user_language(user_id)
-        texts: dict[str, str] = self.langs.get(lang_name, {})
-        return texts.get(key, "").format(**kwargs)
+        return self.translator(user_id)(key, **kwargs)
@@ -2,24 +2,25 @@
 import json
 from typing import Any
 
-from psnawp_api.core.psnawp_exceptions import PSNAWPNotFound
-from psnawp_api.utils.endpoints import BASE_PATH
-from psnawp_api.utils.request_builder import RequestBuilder
+from .psn_client import PSNClient
+from .single_flight import SingleFlight
+
+SEARCH_URL = "https://m.np.playstation.com/api/graphql/v1/op"
 
 class Search:
-    def __init__(self, request_builder: RequestBuilder):
+    def __init__(self, client: PSNClient):
         """The Search class provides the information and methods for searching resources on playstation network.
 
-        :param request_builder: The instance of RequestBuilder. Used to make HTTPRequests.
-        :type request_builder: RequestBuilder
+        :param client: The instance of PSNClient. Used to make HTTPRequests.
+        :type client: PSNClient
 
         """
-        self._request_builder = request_builder
+        self._client = client
+        self._in_flight = SingleFlight("psn_search")
 
-    def universal_search(self, search_query: str, search_context: str) -> dict[str, Any]:
+    async def universal_search(self, search_query: str, search_context: str) -> dict[str, Any]:
         """Searches the PlayStation Website using the new GraphQL endpoint."""
 
-        url = "https://m.np.playstation.com/api/graphql/v1/op"
         variables = {
             "searchTerm": search_query,
             "searchContext": search_context
@@ -38,7 +39,13 @@ class Search:
             "extensions": extensions
         }
 
-        response: dict[str, Any] = self._request_builder.post(url=url, data=json.dumps(payload)).json()
+        # Identical searches running at the same time share one request
+        response: dict[str, Any] = await self._in_flight.run(
+            (search_query, search_context),
+            lambda: self._client.request(
+                "POST", SEARCH_URL, data=json.dumps(payload), operation="universal_search"
+            ),
+        )
         filtered_response = response["data"]["universalContextSearch"]["results"][0]["searchResults"]
 
         return filtered_response
@@ -1,2 +1,23 @@
-def translate_date(time_delta: str, user_id: int, bot):
-    return time_delta.replace("days", bot.get_text(user_id, "days")).replace("day", bot.get_text(user_id, "day"))
+from datetime import timedelta
+from functools import lru_cache
+
+import config
+from .translations import Language, Translator
+
+
+def format_duration(duration: timedelta, texts: Translator) -> str:
+    """
+    Formats a duration like "2 days, 8:05:09" in the language of the translator.
+    """
+    return format_duration_in(duration, texts.language)
+
+
+@lru_cache(maxsize=config.DURATION_CACHE_SIZE)
+def format_duration_in(duration: timedelta, language: Language) -> str:
+    minutes, seconds = divmod(duration.seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    clock = f"{hours}:{minutes:02}:{seconds:02}"
+
+    if not duration.days:
+        return clock
+    return f"{duration.days} {language.plural(duration.days, 'day', 'days')}, {clock}"
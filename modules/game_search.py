@@ -1,7 +1,24 @@
-import requests
+import asyncio
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
 
+import config
+from . import metrics
+from .api.session import SessionManager
+from .igdb_cache import IGDBCache
+from .rate_limit import RateLimiter
+from .single_flight import SingleFlight
+
+GAME_FIELDS = "name,summary,storyline,involved_companies.company.name,cover.url,similar_games.name,platforms.name,first_release_date,videos.video_id,artworks.url,url,genres.name,keywords.name,rating"
+
+# Maximum amount of queries accepted by the IGDB multiquery endpoint in one request
+MULTIQUERY_SIZE = 10
+
+
+def escape_query(query: str) -> str:
+    return query.replace("\\", "\\\\").replace('"', '\\"')
+
 
 class Game:
     def __init__(
@@ -38,94 +55,335 @@ class Game:
 
 
 class IGDB:
-    def __init__(self, client_id, client_secret):
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        cache: IGDBCache,
+        session_manager: SessionManager,
+        rate_limiter: RateLimiter,
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
-        self.URLS = {"games": "https://api.igdb.com/v4/games"}
-        self.token = self.__get_token()
-
-    def __get_token(self):
-        response = requests.post(
-            "https://id.twitch.tv/oauth2/token",
-            data={
-                "client_id": self.client_id,
-                "client_secret": self.client_secret,
-                "grant_type": "client_credentials",
-            },
-        )
-        return response.json()["access_token"]
+        self.URLS = {
+            "token": "https://id.twitch.tv/oauth2/token",
+            "games": "https://api.igdb.com/v4/games",
+            "multiquery": "https://api.igdb.com/v4/multiquery",
+        }
+        self.session_manager = session_manager
+
+        # The token is obtained on the first request, then refreshed shortly before it expires
+        self.token = None
+        self.token_expires_at = 0.0
+        self.token_lock = asyncio.Lock()
+        self.rate_limiter = rate_limiter
+
+        self.cache = cache
+        # Identical queries sent at the same time share one request
+        self.in_flight = SingleFlight("igdb")
+        self.refreshing_keys = set()
+        self.refresh_tasks = set()
+
+    async def __get_token(self, rejected_token: str = None) -> str:
+        """
+        Gets the current token, fetching a new one if it is about to expire or was rejected by IGDB.
+        """
+        async with self.token_lock:
+            if (
+                self.token is None
+                or self.token == rejected_token
+                or time.monotonic() >= self.token_expires_at
+            ):
+                with metrics.upstream_latency.time("igdb", "token"):
+                    async with self.session_manager.get().post(
+                        self.URLS["token"],
+                        data={
+                            "client_id": self.client_id,
+                            "client_secret": self.client_secret,
+                            "grant_type": "client_credentials",
+                        },
+                    ) as response:
+                        response.raise_for_status()
+                        token_data = await response.json()
+
+                self.token = token_data["access_token"]
+                self.token_expires_at = (
+                    time.monotonic()
+                    + token_data["expires_in"]
+                    - config.IGDB_TOKEN_REFRESH_MARGIN
+                )
+            return self.token
+
+    async def __post(self, endpoint: str, data: str) -> list:
+        """
+        Sends an IGDB query to one of the URLS, retrying once with a new token if the current one was rejected,
+        and after a backoff if IGDB answered 429.
+        """
+        rejected_token = None
+        throttled_attempts = 0
+        while True:
+            await self.rate_limiter.acquire("igdb")
+            token = await self.__get_token(rejected_token)
+            headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {token}"}
+            with metrics.upstream_latency.time("igdb", endpoint):
+                async with self.session_manager.get().post(
+                    self.URLS[endpoint], headers=headers, data=data
+                ) as response:
+                    if response.status == 429:
+                        self.rate_limiter.throttled(
+                            "igdb",
+                            response.headers.get("Retry-After"),
+                            throttled_attempts,
+                        )
+                        throttled_attempts += 1
+                        continue
+                    self.rate_limiter.succeeded("igdb")
+                    if response.status == 401 and rejected_token is None:
+                        rejected_token = token
+                        continue
+                    response.raise_for_status()
+                    return await response.json()
+
+    async def search_game(self, query: str, limit: int = 1) -> list[Game]:
+        """
+        Searches a game, serving cached results when possible.
+        Outdated results are still served while they are refreshed in the background.
+        """
+        key = IGDBCache.make_key(query, limit)
+        games_data, is_stale = await self.cache.get(key)
+
+        if games_data is None:
+            games_data = (await self.__fetch_games([query], limit))[query]
+            self.cache.set(key, games_data)
+        elif is_stale:
+            self.__refresh_in_background([query], limit)
 
-    def __get_request_header(self):
-        return {"Client-ID": self.client_id, "Authorization": f"Bearer {self.token}"}
+        return [self.parse_game(game_data) for game_data in games_data]
 
-    def search_game(self, query: str, limit: int = 1) -> list[Game]:
-        response = requests.post(
-            self.URLS["games"],
-            headers=self.__get_request_header(),
-            data=f'search "{query}"; fields name,summary,storyline,involved_companies.company.name,cover.url,similar_games.name,platforms.name,first_release_date,videos.video_id,artworks.url,url,genres.name,keywords.name,rating; limit {limit};',
+    async def search_game_ids(
+        self, query: str, limit: int = 100
+    ) -> list[tuple[int, str]]:
+        """
+        Searches games but only returns their IDs and names, which is enough to page through the results
+        before loading the full details of the chosen one with get_game.
+        """
+        games_data = await self.__cached_query(
+            f"ids:{IGDBCache.make_key(query, limit)}",
+            f'search "{escape_query(query)}"; fields id,name; limit {limit};',
         )
-        games_data = response.json()
-        games = []
-
-        for game_data in games_data:
-            name = game_data.get("name")
-            description = game_data.get("summary")
-            story = game_data.get("storyline")
-            publishers = [
-                company["company"]["name"]
-                for company in game_data.get("involved_companies", [])
-            ]
-            cover_url = game_data.get("cover", {}).get("url")
-            if cover_url and cover_url.startswith("//"):
-                cover_url = f"https:{cover_url}".replace("t_thumb", "t_original")
-            similar_games = [
-                similar_game["name"]
-                for similar_game in game_data.get("similar_games", [])
-            ]
-            platforms = [
-                platform["name"] for platform in game_data.get("platforms", [])
-            ]
-            release_date = (
-                datetime.utcfromtimestamp(game_data["first_release_date"])
-                if game_data.get("first_release_date")
-                else None
+        return [(game_data["id"], game_data.get("name")) for game_data in games_data]
+
+    async def get_game(self, game_id: int) -> Game | None:
+        games_data = await self.__cached_query(
+            f"id:{game_id}",
+            f"where id = {int(game_id)}; fields {GAME_FIELDS}; limit 1;",
+        )
+        return self.parse_game(games_data[0]) if games_data else None
+
+    async def __cached_query(self, key: str, query: str) -> list[dict]:
+        games_data, is_stale = await self.cache.get(key)
+
+        if games_data is None:
+
+            async def fetch_and_store() -> list[dict]:
+                games_data = await self.__post("games", query)
+                self.cache.set(key, games_data)
+                return games_data
+
+            games_data = await self.in_flight.run(key, fetch_and_store)
+        elif is_stale and key not in self.refreshing_keys:
+            self.refreshing_keys.add(key)
+
+            async def refresh():
+                try:
+                    self.cache.set(key, await self.__post("games", query))
+                finally:
+                    self.refreshing_keys.discard(key)
+
+            task = asyncio.create_task(refresh())
+            self.refresh_tasks.add(task)
+            task.add_done_callback(self.refresh_tasks.discard)
+
+        return games_data
+
+    async def search_games(
+        self, queries: list[str], limit: int = 1
+    ) -> dict[str, list[Game]]:
+        """
+        Searches many games at once through the IGDB multiquery endpoint,
+        which resolves up to MULTIQUERY_SIZE searches per request.
+
+        Args:
+            queries (list[str]): The names of the games to look for.
+            limit (int): The amount of results for each name.
+
+        Returns:
+            dict[str, list[Game]]: The games found for each name.
+        """
+        games_data = {}
+        missing_queries = []
+        stale_queries = []
+
+        for query in dict.fromkeys(queries):
+            cached_data, is_stale = await self.cache.get(
+                IGDBCache.make_key(query, limit)
             )
-            medias = {
-                "videos": [
-                    f'https://www.youtube.com/watch?v={video["video_id"]}'
-                    for video in game_data.get("videos", [])
-                ],
-                "artworks": [
-                    (
-                        f'https:{artwork["url"].replace("t_thumb", "t_original")}'
-                        if artwork["url"].startswith("//")
-                        else artwork["url"]
-                    )
-                    for artwork in game_data.get("artworks", [])
-                ],
+            if cached_data is None:
+                missing_queries.append(query)
+                continue
+
+            games_data[query] = cached_data
+            if is_stale:
+                stale_queries.append(query)
+
+        if missing_queries:
+            fetched_data = await self.__fetch_games(missing_queries, limit)
+            for query, query_data in fetched_data.items():
+                self.cache.set(IGDBCache.make_key(query, limit), query_data)
+            games_data.update(fetched_data)
+
+        if stale_queries:
+            self.__refresh_in_background(stale_queries, limit)
+
+        return {
+            query: [self.parse_game(game_data) for game_data in query_data]
+            for query, query_data in games_data.items()
+        }
+
+    async def __fetch_games(
+        self, queries: list[str], limit: int
+    ) -> dict[str, list[dict]]:
+        """
+        Fetches the raw results of the queries from IGDB, MULTIQUERY_SIZE queries per request.
+        The queries already being fetched are joined instead of being sent again.
+        """
+        keys = {IGDBCache.make_key(query, limit): query for query in queries}
+
+        async def fetch_many(missing_keys: list[str]) -> dict[str, list[dict]]:
+            fetched_data = await self.__send_multiquery(
+                [keys[key] for key in missing_keys], limit
+            )
+            return {
+                IGDBCache.make_key(query, limit): query_data
+                for query, query_data in fetched_data.items()
             }
-            url = game_data.get("url")
-            genres = [genre["name"] for genre in game_data.get("genres", [])]
-            keywords = [keyword["name"] for keyword in game_data.get("keywords", [])]
-            rating = game_data.get("rating")
-
-            games.append(
-                Game(
-                    data=game_data,
-                    name=name,
-                    description=description,
-                    story=story,
-                    publishers=publishers,
-                    cover_url=cover_url,
-                    similar_games=similar_games,
-                    platforms=platforms,
-                    release_date=release_date,
-                    medias=medias,
-                    url=url,
-                    genres=genres,
-                    keywords=keywords,
-                    rating=rating,
+
+        games_data = await self.in_flight.run_many(keys, fetch_many)
+        return {
+            query: games_data[IGDBCache.make_key(query, limit)]
+            for query in queries
+            if IGDBCache.make_key(query, limit) in games_data
+        }
+
+    async def __send_multiquery(
+        self, queries: list[str], limit: int
+    ) -> dict[str, list[dict]]:
+        chunks = [
+            queries[start : start + MULTIQUERY_SIZE]
+            for start in range(0, len(queries), MULTIQUERY_SIZE)
+        ]
+        responses = await asyncio.gather(
+            *(
+                self.__post(
+                    "multiquery",
+                    "".join(
+                        f'query games "{i}" {{ search "{escape_query(query)}"; fields {GAME_FIELDS}; limit {limit}; }};'
+                        for i, query in enumerate(chunk)
+                    ),
                 )
+                for chunk in chunks
             )
+        )
+
+        games_data = {}
+        for chunk, response in zip(chunks, responses):
+            for query_result in response:
+                games_data[chunk[int(query_result["name"])]] = query_result.get(
+                    "result", []
+                )
+
+        return games_data
+
+    def __refresh_in_background(self, queries: list[str], limit: int):
+        keys = {IGDBCache.make_key(query, limit): query for query in queries}
+        queries = [
+            query for key, query in keys.items() if key not in self.refreshing_keys
+        ]
+        if not queries:
+            return
+        self.refreshing_keys.update(keys)
+
+        async def refresh():
+            try:
+                for query, query_data in (
+                    await self.__fetch_games(queries, limit)
+                ).items():
+                    self.cache.set(IGDBCache.make_key(query, limit), query_data)
+            finally:
+                self.refreshing_keys.difference_update(keys)
 
-        return games
+        task = asyncio.create_task(refresh())
+        self.refresh_tasks.add(task)
+        task.add_done_callback(self.refresh_tasks.discard)
+
+    def close(self):
+        for task in self.refresh_tasks:
+            task.cancel()
+        self.cache.close()
+
+    @staticmethod
+    def parse_game(game_data: dict) -> Game:
+        name = game_data.get("name")
+        description = game_data.get("summary")
+        story = game_data.get("storyline")
+        publishers = [
+            company["company"]["name"]
+            for company in game_data.get("involved_companies", [])
+        ]
+        cover_url = game_data.get("cover", {}).get("url")
+        if cover_url and cover_url.startswith("//"):
+            cover_url = f"https:{cover_url}".replace("t_thumb", "t_original")
+        similar_games = [
+            similar_game["name"] for similar_game in game_data.get("similar_games", [])
+        ]
+        platforms = [platform["name"] for platform in game_data.get("platforms", [])]
+        release_date = (
+            datetime.utcfromtimestamp(game_data["first_release_date"])
+            if game_data.get("first_release_date")
+            else None
+        )
+        medias = {
+            "videos": [
+                f'https://www.youtube.com/watch?v={video["video_id"]}'
+                for video in game_data.get("videos", [])
+            ],
+            "artworks": [
+                (
+                    f'https:{artwork["url"].replace("t_thumb", "t_original")}'
+                    if artwork["url"].startswith("//")
+                    else artwork["url"]
+                )
+                for artwork in game_data.get("artworks", [])
+            ],
+        }
+        url = game_data.get("url")
+        genres = [genre["name"] for genre in game_data.get("genres", [])]
+        keywords = [keyword["name"] for keyword in game_data.get("keywords", [])]
+        rating = game_data.get("rating")
+
+        return Game(
+            data=game_data,
+            name=name,
+            description=description,
+            story=story,
+            publishers=publishers,
+            cover_url=cover_url,
+            similar_games=similar_games,
+            platforms=platforms,
+            release_date=release_date,
+            medias=medias,
+            url=url,
+            genres=genres,
+            keywords=keywords,
+            rating=rating,
+        )
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import TTLCache
+
+
+class IGDBCache:
+    def __init__(
+        self,
+        path: str,
+        fresh_ttl: float,
+        max_age: float,
+        max_bytes: int,
+        warm_entries: int,
+    ):
+        """
+        Persistent cache of the raw IGDB results, stored in a SQLite file with its most used entries kept in memory.
+        Only the memory is used on the event loop: the file is read and written by a thread of its own.
+
+        Args:
+            path (str): The path of the SQLite file.
+            fresh_ttl (float): Seconds during which an entry is served without being refreshed.
+            max_age (float): Seconds after which an entry is too old to be served at all.
+            max_bytes (int): The maximum size of the stored results, the least recently used ones are evicted first.
+            warm_entries (int): The amount of entries kept in memory, loaded from the file at startup.
+        """
+        self.fresh_ttl = fresh_ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        # Access times of the hits, written with the next commit rather than one UPDATE per hit
+        self.accessed: dict[str, float] = {}
+
+        # The only thread using the connection once the cache is loaded, which also keeps the writes in order
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="igdb-cache")
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # Keeps the commits cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS igdb_results (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """)
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS igdb_results_accessed_at ON igdb_results (accessed_at)"
+        )
+        self.connection.commit()
+
+        self.total_size = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM igdb_results"
+        ).fetchone()[0]
+
+        self.memory = TTLCache(warm_entries)
+        rows = self.connection.execute(
+            "SELECT key, payload, fetched_at FROM igdb_results ORDER BY accessed_at DESC LIMIT ?",
+            (warm_entries,),
+        ).fetchall()
+        for key, payload, fetched_at in reversed(rows):
+            self.memory.set(key, (fetched_at, json.loads(payload)))
+
+    @staticmethod
+    def make_key(query: str, limit: int) -> str:
+        return f"{limit}:{' '.join(query.lower().split())}"
+
+    async def get(self, key: str) -> tuple[list | None, bool]:
+        """
+        Gets the results stored for a key.
+
+        Returns:
+            tuple[list | None, bool]: The results (None if missing or too old) and whether they should be refreshed.
+        """
+        entry = self.memory.get(key)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            entry = await loop.run_in_executor(self.writer, self.read, key)
+            if entry is None:
+                return None, False
+            self.memory.set(key, entry)
+
+        self.accessed[key] = time.time()
+
+        fetched_at, results = entry
+        age = time.time() - fetched_at
+        if age > self.max_age:
+            return None, False
+        return results, age > self.fresh_ttl
+
+    def set(self, key: str, results: list):
+        "Stores the results in memory right away, and in the file in the background."
+        now = time.time()
+        self.memory.set(key, (now, results))
+
+        self.accessed.pop(key, None)
+        accessed, self.accessed = self.accessed, {}
+        write = asyncio.get_running_loop().run_in_executor(
+            self.writer, self.write, key, results, now, accessed
+        )
+        write.add_done_callback(self.forget_evicted)
+
+    def read(self, key: str) -> tuple[float, list] | None:
+        row = self.connection.execute(
+            "SELECT fetched_at, payload FROM igdb_results WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def write(
+        self, key: str, results: list, now: float, accessed: dict[str, float]
+    ) -> list[str]:
+        """
+        Stores the results of a key along with the pending access times, evicting old results if needed.
+
+        Returns:
+            list[str]: The evicted keys.
+        """
+        payload = json.dumps(results)
+        row = self.connection.execute(
+            "SELECT size FROM igdb_results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self.total_size -= row[0]
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO igdb_results VALUES (?, ?, ?, ?, ?)",
+            (key, payload, len(payload), now, now),
+        )
+        self.total_size += len(payload)
+        self.write_accesses(accessed)
+
+        evicted_keys = []
+        if self.total_size > self.max_bytes:
+            evicted_keys = self.evict()
+        self.connection.commit()
+        return evicted_keys
+
+    def forget_evicted(self, write: asyncio.Future):
+        if write.cancelled():
+            return
+        if write.exception() is not None:
+            print(f"Could not store IGDB results: {write.exception()!r}")
+            return
+        for key in write.result():
+            self.memory.pop(key)
+
+    def write_accesses(self, accessed: dict[str, float]):
+        "Writes the pending access times, so the eviction and the warm start see every hit."
+        self.connection.executemany(
+            "UPDATE igdb_results SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in accessed.items()],
+        )
+
+    def evict(self) -> list[str]:
+        """
+        Deletes the least recently used results until the cache is back under 90% of its maximum size.
+        """
+        target_size = self.max_bytes * 0.9
+        rows = self.connection.execute(
+            "SELECT key, size FROM igdb_results ORDER BY accessed_at"
+        )
+        evicted_keys = []
+        for key, size in rows:
+            if self.total_size <= target_size:
+                break
+            evicted_keys.append(key)
+            self.total_size -= size
+
+        self.connection.executemany(
+            "DELETE FROM igdb_results WHERE key = ?", [(key,) for key in evicted_keys]
+        )
+        return evicted_keys
+
+    def close(self):
+        "Waits for the pending writes, then writes the access times for the next warm start."
+        accessed, self.accessed = self.accessed, {}
+        self.writer.submit(self.close_connection, accessed)
+        self.writer.shutdown(wait=True)
+
+    def close_connection(self, accessed: dict[str, float]):
+        self.write_accesses(accessed)
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,241 @@
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+from .cache import TTLCache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    """Formats the labels of a sample, like {command="user-search"}."""
+    if not names:
+        return ""
+    pairs = (f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labels, value in self.values.items():
+            lines.append(
+                f"{self.name}{format_labels(self.label_names, labels)} {value}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, *labels):
+        self.values[labels] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [count of each bucket..., count, sum]
+        self.values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labels):
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += 1
+        counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        "Observes the duration of the block, and counts the errors raised in it by type."
+        started_at = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            errors.inc(labels[0] if labels else self.name, type(e).__name__)
+            raise
+        finally:
+            self.observe(time.perf_counter() - started_at, *labels)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_names = self.label_names + ("le",)
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, counts in self.values.items():
+            # The +Inf bucket holds every observation
+            for bound, count in zip(bounds, counts[:-2] + [counts[-2]]):
+                lines.append(
+                    f"{self.name}_bucket{format_labels(bucket_names, labels + (bound,))} {count}"
+                )
+            label_text = format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_count{label_text} {counts[-2]}")
+            lines.append(f"{self.name}_sum{label_text} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        "Every metric of the bot, rendered in the Prometheus text format."
+        self.metrics: list[Counter | Gauge | Histogram] = []
+        self.caches: dict[str, TTLCache] = {}
+
+    def counter(self, name: str, description: str, *label_names: str) -> Counter:
+        metric = Counter(name, description, label_names)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, description: str, *label_names: str) -> Gauge:
+        metric = Gauge(name, description, label_names)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        *label_names: str,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, description, label_names, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def track_cache(self, name: str, cache: TTLCache):
+        "Exposes the hits and misses of a cache, read when the metrics are scraped."
+        self.caches[name] = cache
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        for metric, kind, description, read in (
+            (
+                "psnbot_cache_hits_total",
+                "counter",
+                "Lookups answered by a cache.",
+                lambda cache: cache.hits,
+            ),
+            (
+                "psnbot_cache_misses_total",
+                "counter",
+                "Lookups not answered by a cache.",
+                lambda cache: cache.misses,
+            ),
+            (
+                "psnbot_cache_hit_ratio",
+                "gauge",
+                "Share of the lookups answered by a cache.",
+                lambda cache: cache.hit_ratio,
+            ),
+            (
+                "psnbot_cache_entries",
+                "gauge",
+                "Entries currently held by a cache.",
+                len,
+            ),
+        ):
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+            for name, cache in self.caches.items():
+                lines.append(
+                    f"{metric}{format_labels(('cache',), (name,))} {read(cache)}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+command_latency = registry.histogram(
+    "psnbot_command_duration_seconds",
+    "Duration of the slash commands.",
+    "command",
+)
+upstream_latency = registry.histogram(
+    "psnbot_upstream_duration_seconds",
+    "Duration of the calls to PSN, IGDB, the PlayStation Store and ColorThief.",
+    "upstream",
+    "operation",
+)
+errors = registry.counter(
+    "psnbot_errors_total",
+    "Errors raised by the commands and the upstream calls, by exception type.",
+    "source",
+    "type",
+)
+loop_lag = registry.histogram(
+    "psnbot_event_loop_lag_seconds",
+    "Delay before the event loop runs a task scheduled right away.",
+    buckets=LAG_BUCKETS,
+)
+
+
+class MetricsServer:
+    def __init__(self, host: str, port: int):
+        """
+        Local HTTP endpoint serving the metrics to Prometheus at /metrics.
+        """
+        self.host = host
+        self.port = port
+        self.runner: web.AppRunner | None = None
+
+    async def start(self):
+        if self.runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError:
+            await runner.cleanup()
+            raise
+        self.runner = runner
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=registry.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,55 @@
+import discord
+
+
+class Paginator(discord.ui.View):
+    def __init__(
+        self,
+        user_id: int,
+        page_count: int,
+        get_page,
+        index: int = 0,
+        timeout: float = None,
+    ):
+        """
+        View with previous/next buttons, building each page only when it is displayed.
+
+        Args:
+            user_id (int): The ID of the only user allowed to change the page.
+            page_count (int): The amount of pages.
+            get_page (callable): Coroutine function returning the embed of a page from its index.
+            index (int): The index of the page displayed first.
+            timeout (float): Seconds of inactivity after which the buttons stop working.
+        """
+        super().__init__(timeout=timeout)
+        self.user_id = user_id
+        self.page_count = page_count
+        self.get_page = get_page
+        self.index = index
+        self.update_buttons()
+
+    def update_buttons(self):
+        self.previous_page.disabled = self.index <= 0
+        self.next_page.disabled = self.index >= self.page_count - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id
+
+    async def show_page(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        embed = await self.get_page(self.index)
+        self.update_buttons()
+        await interaction.edit_original_response(embed=embed, view=self)
+
+    @discord.ui.button(emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, button: discord.ui.Button, interaction: discord.Interaction
+    ):
+        self.index = max(self.index - 1, 0)
+        await self.show_page(interaction)
+
+    @discord.ui.button(emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(
+        self, button: discord.ui.Button, interaction: discord.Interaction
+    ):
+        self.index = min(self.index + 1, self.page_count - 1)
+        await self.show_page(interaction)
@@ -0,0 +1,114 @@
+from typing import Any
+
+from psnawp_api.models.title_stats import TitleStats
+from psnawp_api.models.trophies.trophy_summary import TrophySummary
+
+import config
+from .cache import MISSING, TTLCache
+from .psn_client import PSNClient, PSNUser
+from .single_flight import SingleFlight
+
+
+class CachedPSNClient(PSNClient):
+    def __init__(self, *args, **kwargs):
+        """
+        PSNClient keeping the fetched data in memory, with a different lifetime for each kind of data.
+        Users are stored by account ID, and online IDs only point to an account ID, so looking an user up
+        by either of them shares the same entries.
+        Concurrent misses of the same entry share a single request.
+        """
+        super().__init__(*args, **kwargs)
+        self.caches = {
+            kind: TTLCache(config.PSN_CACHE_MAX_ENTRIES, ttl)
+            for kind, ttl in config.PSN_CACHE_TTLS.items()
+        }
+        self.in_flight = SingleFlight("psn")
+
+    async def cached(self, kind: str, key, fetch) -> Any:
+        """
+        Returns the cached value for the key, or fetches and stores it.
+
+        Args:
+            kind (str): The kind of data (one of the keys of config.PSN_CACHE_TTLS).
+            key (Any): The key of the entry.
+            fetch (callable): Coroutine function fetching the value when it isn't cached.
+        """
+        cache = self.caches[kind]
+        value = cache.get(key, MISSING)
+        if value is MISSING:
+
+            async def fetch_and_store():
+                value = await fetch()
+                cache.set(key, value)
+                return value
+
+            value = await self.in_flight.run((kind, key), fetch_and_store)
+        return value
+
+    def stats(self) -> dict[str, tuple[int, int]]:
+        """
+        Returns:
+            dict[str, tuple[int, int]]: The amount of hits and misses for each kind of data.
+        """
+        return {kind: (cache.hits, cache.misses) for kind, cache in self.caches.items()}
+
+    async def user(self, online_id: str = None, account_id: str = None) -> PSNUser:
+        if account_id is None:
+            account_id = self.caches["account_id"].get(online_id.lower())
+
+        if account_id is not None:
+            user = self.caches["user"].get(account_id)
+            if user is not None:
+                return user
+
+        async def fetch_and_store() -> PSNUser:
+            user = await super(CachedPSNClient, self).user(
+                online_id=online_id, account_id=account_id
+            )
+            self.caches["user"].set(user.account_id, user)
+            for name in {user.online_id, user.prev_online_id}:
+                self.caches["account_id"].set(name.lower(), user.account_id)
+            return user
+
+        return await self.in_flight.run(
+            ("user", account_id or online_id.lower()), fetch_and_store
+        )
+
+    async def profile(self, account_id: str) -> dict[str, Any]:
+        return await self.cached(
+            "profile",
+            account_id,
+            lambda: super(CachedPSNClient, self).profile(account_id),
+        )
+
+    async def friendship(self, account_id: str) -> dict[str, Any]:
+        return await self.cached(
+            "friendship",
+            account_id,
+            lambda: super(CachedPSNClient, self).friendship(account_id),
+        )
+
+    async def presence(self, account_id: str) -> dict[str, Any]:
+        return await self.cached(
+            "presence",
+            account_id,
+            lambda: super(CachedPSNClient, self).presence(account_id),
+        )
+
+    async def trophy_summary(self, account_id: str) -> TrophySummary:
+        return await self.cached(
+            "trophy_summary",
+            account_id,
+            lambda: super(CachedPSNClient, self).trophy_summary(account_id),
+        )
+
+    async def title_stats_page(
+        self, account_id: str, limit: int, offset: int = 0
+    ) -> tuple[list[TitleStats], int, int]:
+        return await self.cached(
+            "title_stats",
+            (account_id, limit, offset),
+            lambda: super(CachedPSNClient, self).title_stats_page(
+                account_id, limit, offset
+            ),
+        )
@@ -0,0 +1,406 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+
+from psnawp_api.core import psnawp_exceptions
+from psnawp_api.core.authenticator import Authenticator
+from psnawp_api.models.title_stats import TitleStats
+from psnawp_api.models.trophies.trophy_constants import TrophySet
+from psnawp_api.models.trophies.trophy_summary import TrophySummary
+from psnawp_api.utils.endpoints import API_PATH, BASE_PATH
+
+import config
+from . import metrics
+from .api.session import SessionManager
+from .psn_credentials import CredentialPool, PSNCredential, obtain_access_token
+from .psn_executor import PSNExecutor
+from .rate_limit import RateLimited, RateLimiter
+
+STATUS_EXCEPTIONS = {
+    400: psnawp_exceptions.PSNAWPBadRequest,
+    401: psnawp_exceptions.PSNAWPUnauthorized,
+    403: psnawp_exceptions.PSNAWPForbidden,
+    404: psnawp_exceptions.PSNAWPNotFound,
+    405: psnawp_exceptions.PSNAWPNotAllowed,
+}
+
+
+@dataclass
+class PSNUser:
+    online_id: str
+    account_id: str
+    prev_online_id: str
+
+
+class PSNClient:
+    DEFAULT_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36",
+        "Content-Type": "application/json",
+        "Accept-Language": "en-US",
+        "Country": "US",
+    }
+    TITLE_CATEGORIES = "ps4_game,ps5_native_game"
+    # The rate limiter family of each operation
+    FAMILIES = {
+        "legacy_profile": "psn_profile",
+        "profile": "psn_profile",
+        "friendship": "psn_profile",
+        "presence": "psn_profile",
+        "trophy_summary": "psn_trophies",
+        "title_stats": "psn_games",
+        "universal_search": "psn_search",
+    }
+
+    def __init__(
+        self,
+        credentials: CredentialPool,
+        executor: PSNExecutor,
+        session_manager: SessionManager,
+        rate_limiter: RateLimiter,
+    ):
+        """
+        Asynchronous client for the PSN endpoints used by the bot, sharing one pooled aiohttp session.
+
+        Args:
+            credentials (CredentialPool): The NPSSO tokens the requests are spread over.
+            executor (PSNExecutor): The executor used for the (rare) blocking token refreshes.
+            session_manager (SessionManager): The owner of the shared aiohttp session.
+            rate_limiter (RateLimiter): The rate limiter shared by every upstream client.
+        """
+        self.credentials = credentials
+        self.executor = executor
+        self.session_manager = session_manager
+        self.rate_limiter = rate_limiter
+
+    async def get_access_token(
+        self, credential: PSNCredential, rejected_token: str = None
+    ) -> str:
+        """
+        Gets an access token of the credential, only asking its authenticator again once the current one is old.
+
+        Args:
+            rejected_token (str): A token PSN refused, which must be replaced.
+
+        Returns:
+            str: The bearer token to send to PSN.
+
+        Raises:
+            PSNAWPAuthenticationError: If the NPSSO token of the credential expired.
+        """
+        async with credential.token_lock:
+            token_age = time.monotonic() - credential.access_token_obtained_at
+            if (
+                credential.access_token is None
+                or credential.access_token == rejected_token
+                or token_age > config.PSN_ACCESS_TOKEN_TTL
+            ):
+                if rejected_token is not None:
+                    # Makes the authenticator believe its token expired
+                    credential.authenticator._auth_properties[
+                        "access_token_expires_at"
+                    ] = 0
+                await self.rate_limiter.acquire("psn_auth", credential.name)
+                with metrics.upstream_latency.time("psn", "access_token"):
+                    credential.access_token = await self.executor.run(
+                        obtain_access_token, credential.authenticator
+                    )
+                credential.access_token_obtained_at = time.monotonic()
+            return credential.access_token
+
+    async def refresh_credentials(self) -> int:
+        """
+        Authenticates every credential again from its NPSSO token, as an authenticator whose refresh token
+        was refused can't recover, and gives back the expired ones PSN accepts again.
+        A credential failing doesn't keep the next ones from being refreshed.
+
+        Returns:
+            int: The amount of credentials PSN accepted.
+        """
+        accepted = 0
+        for credential in self.credentials.credentials:
+            try:
+                await self.rate_limiter.acquire("psn_auth", credential.name)
+                async with credential.token_lock:
+                    credential.authenticator = await self.executor.run(
+                        Authenticator, credential.npsso
+                    )
+                    credential.access_token = None
+                await self.get_access_token(credential)
+            except psnawp_exceptions.PSNAWPAuthenticationError:
+                self.credentials.expire(credential)
+            except Exception as error:
+                print(f"Could not refresh the NPSSO token {credential.name}: {error!r}")
+            else:
+                self.credentials.restore(credential)
+                accepted += 1
+        return accepted
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: dict = None,
+        data: str = None,
+        operation: str = "other",
+    ) -> dict[str, Any]:
+        """
+        Sends an authenticated request to PSN and returns the decoded JSON.
+        The request is sent with the least loaded credential of the pool, and rate limited for that account.
+        The token is refreshed and the request retried once when PSN answers 401, and the request is
+        retried after a backoff, or right away with another account, when PSN answers 429.
+
+        Args:
+            operation (str): The name of the endpoint, under which the latency of the request is recorded.
+
+        Raises:
+            PSNAWPException: The PSNAWP exception matching the HTTP status.
+            PSNAWPAuthenticationError: If every NPSSO token of the pool expired.
+            RateLimited: If PSN kept answering 429.
+        """
+        family = self.FAMILIES.get(operation, "psn_profile")
+        unauthorized = False
+        throttled_attempts = 0
+        while True:
+            async with self.credentials.use() as credential:
+                await self.rate_limiter.acquire(family, credential.name)
+                try:
+                    access_token = await self.get_access_token(credential)
+                except psnawp_exceptions.PSNAWPAuthenticationError:
+                    self.credentials.expire(credential)
+                    continue
+                headers = {
+                    **self.DEFAULT_HEADERS,
+                    "Authorization": f"Bearer {access_token}",
+                }
+                with metrics.upstream_latency.time("psn", operation):
+                    async with self.session_manager.get().request(
+                        method, url, params=params, data=data, headers=headers
+                    ) as response:
+                        text = await response.text()
+                        if response.status == 429:
+                            self.throttled(
+                                credential,
+                                family,
+                                response.headers.get("Retry-After"),
+                                throttled_attempts,
+                            )
+                            throttled_attempts += 1
+                            continue
+                        self.rate_limiter.succeeded(family, credential.name)
+                        if response.status != 401:
+                            self.check_response(response.status, text)
+                            return await response.json(content_type=None)
+
+                # The retry may go through another credential, so the rejected token is refreshed right away
+                try:
+                    await self.get_access_token(credential, access_token)
+                except psnawp_exceptions.PSNAWPAuthenticationError:
+                    self.credentials.expire(credential)
+                if unauthorized:
+                    self.check_response(response.status, text)
+                unauthorized = True
+
+    def throttled(
+        self,
+        credential: PSNCredential,
+        family: str,
+        retry_after: str | None,
+        attempt: int,
+    ):
+        """
+        Sets a credential PSN throttled aside for the pause decided by the rate limiter.
+
+        Raises:
+            RateLimited: If the request shouldn't be retried, with this account or another one.
+        """
+        try:
+            delay = self.rate_limiter.throttled(
+                family, retry_after, attempt, credential.name
+            )
+        except RateLimited as rate_limited:
+            self.credentials.set_aside(credential, rate_limited.retry_after)
+            # Another account may still have some quota left
+            if (
+                attempt >= self.rate_limiter.max_retries
+                or not self.credentials.has_available()
+            ):
+                raise
+        else:
+            self.credentials.set_aside(credential, delay)
+
+    @staticmethod
+    def check_response(status: int, text: str):
+        if status in STATUS_EXCEPTIONS:
+            raise STATUS_EXCEPTIONS[status](text)
+        if status >= 500:
+            raise psnawp_exceptions.PSNAWPServerError(text)
+        if status >= 400:
+            raise psnawp_exceptions.PSNAWPException(text)
+
+    async def user(self, online_id: str = None, account_id: str = None) -> PSNUser:
+        """
+        Resolves an user by its online ID or its account ID.
+
+        Raises:
+            PSNAWPNotFound: If the user doesn't exist.
+        """
+        if account_id is not None:
+            try:
+                profile = await self.profile(account_id)
+            except psnawp_exceptions.PSNAWPBadRequest as bad_request:
+                raise psnawp_exceptions.PSNAWPNotFound(
+                    f"Account ID {account_id} does not exist."
+                ) from bad_request
+            return PSNUser(profile["onlineId"], account_id, profile["onlineId"])
+
+        try:
+            response = await self.request(
+                "GET",
+                f"{BASE_PATH['legacy_profile_uri']}{API_PATH['legacy_profile'].format(online_id=online_id)}",
+                params={"fields": "accountId,onlineId,currentOnlineId"},
+                operation="legacy_profile",
+            )
+        except psnawp_exceptions.PSNAWPNotFound as not_found:
+            raise psnawp_exceptions.PSNAWPNotFound(
+                f"Online ID {online_id} does not exist."
+            ) from not_found
+        profile = response["profile"]
+        current_online_id = profile.get("currentOnlineId") or profile.get("onlineId")
+        return PSNUser(
+            current_online_id,
+            profile["accountId"],
+            profile.get("onlineId") or current_online_id,
+        )
+
+    async def profile(self, account_id: str) -> dict[str, Any]:
+        return await self.request(
+            "GET",
+            f"{BASE_PATH['profile_uri']}{API_PATH['profiles'].format(account_id=account_id)}",
+            operation="profile",
+        )
+
+    async def friendship(self, account_id: str) -> dict[str, Any]:
+        return await self.request(
+            "GET",
+            f"{BASE_PATH['profile_uri']}{API_PATH['friends_summary'].format(account_id=account_id)}",
+            operation="friendship",
+        )
+
+    async def presence(self, account_id: str) -> dict[str, Any]:
+        return await self.request(
+            "GET",
+            f"{BASE_PATH['profile_uri']}/{account_id}{API_PATH['basic_presences']}",
+            params={"type": "primary"},
+            operation="presence",
+        )
+
+    async def trophy_summary(self, account_id: str) -> TrophySummary:
+        response = await self.request(
+            "GET",
+            f"{BASE_PATH['trophies']}{API_PATH['trophy_summary'].format(account_id=account_id)}",
+            operation="trophy_summary",
+        )
+        return TrophySummary(
+            account_id=account_id,
+            trophy_level=response.get("trophyLevel", -1),
+            progress=response.get("progress", -1),
+            tier=response.get("tier", -1),
+            earned_trophies=TrophySet(
+                **response.get(
+                    "earnedTrophies",
+                    {"bronze": 0, "silver": 0, "gold": 0, "platinum": 0},
+                )
+            ),
+        )
+
+    async def title_stats_page(
+        self, account_id: str, limit: int, offset: int = 0
+    ) -> tuple[list[TitleStats], int, int]:
+        """
+        Fetches a single page of the user's title stats.
+
+        Returns:
+            tuple[list[TitleStats], int, int]: The titles, the offset of the next page (0 when done) and the total amount of titles.
+        """
+        response = await self.request(
+            "GET",
+            f"{BASE_PATH['games_list']}{API_PATH['user_game_data'].format(account_id=account_id)}",
+            params={
+                "categories": self.TITLE_CATEGORIES,
+                "limit": limit,
+                "offset": offset,
+            },
+            operation="title_stats",
+        )
+        titles = [TitleStats.from_dict(title) for title in response.get("titles", [])]
+        return (
+            titles,
+            response.get("nextOffset") or 0,
+            response.get("totalItemCount", 0),
+        )
+
+    async def title_stats_pages(
+        self, account_id: str, max_pages: int = None
+    ) -> AsyncIterator[tuple[list[TitleStats], int]]:
+        """
+        Fetches the user's title stats page by page, stopping after max_pages pages if given.
+        Once the first page gives the total, the next ones are read ahead concurrently,
+        with at most TITLE_STATS_PREFETCH_PAGES pages waiting to be consumed.
+
+        Yields:
+            tuple[list[TitleStats], int]: The titles of a page and the total amount of titles.
+        """
+        page_size = config.TITLE_STATS_PAGE_SIZE
+        page, next_offset, total = await self.title_stats_page(account_id, page_size, 0)
+        yield page, total
+        if next_offset <= 0 or not page:
+            return
+
+        offsets = range(next_offset, total, page_size)
+        if max_pages is not None:
+            offsets = offsets[: max(max_pages - 1, 0)]
+        offsets = iter(offsets)
+
+        def prefetch(count: int):
+            for offset in itertools.islice(offsets, count):
+                pending.append(
+                    asyncio.create_task(
+                        self.title_stats_page(account_id, page_size, offset)
+                    )
+                )
+
+        pending: deque[asyncio.Task] = deque()
+        try:
+            prefetch(config.TITLE_STATS_PREFETCH_PAGES)
+            while pending:
+                page, _, total = await pending.popleft()
+                # Keeps the buffer full while the consumer handles this page
+                prefetch(1)
+                yield page, total
+                if not page:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def title_stats(self, account_id: str, limit: int = None) -> list[TitleStats]:
+        """
+        Fetches the user's title stats, page by page, until the limit is reached.
+        """
+        page_size = (
+            min(limit, config.TITLE_STATS_PAGE_SIZE)
+            if limit
+            else config.TITLE_STATS_PAGE_SIZE
+        )
+        titles = []
+        offset = 0
+        while True:
+            page, offset, _ = await self.title_stats_page(account_id, page_size, offset)
+            titles.extend(page)
+            if limit is not None and len(titles) >= limit:
+                return titles[:limit]
+            if offset <= 0 or not page:
+                return titles
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from psnawp_api.core import psnawp_exceptions
+from psnawp_api.core.authenticator import Authenticator
+
+from . import metrics
+from .rate_limit import RateLimited
+
+credential_in_flight = metrics.registry.gauge(
+    "psnbot_psn_credential_in_flight",
+    "Requests currently sent with each NPSSO token of the pool.",
+    "credential",
+)
+credential_expired = metrics.registry.gauge(
+    "psnbot_psn_credential_expired",
+    "Whether each NPSSO token of the pool was refused by PSN and set aside.",
+    "credential",
+)
+
+
+@dataclass
+class PSNCredential:
+    "One NPSSO token of the pool, with its access token and its health."
+
+    name: str
+    authenticator: Authenticator
+    access_token: str | None = None
+    access_token_obtained_at: float = 0.0
+    token_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    in_flight: int = 0
+    last_used_at: float = 0.0
+    throttled_until: float = 0.0
+    expired: bool = False
+
+    @property
+    def available(self) -> bool:
+        return not self.expired and time.monotonic() >= self.throttled_until
+
+    @property
+    def npsso(self) -> str:
+        return self.authenticator._npsso_token
+
+
+def obtain_access_token(authenticator: Authenticator) -> str:
+    """
+    Blocking refresh of the access token of an authenticator.
+    PSNAWP doesn't raise PSNAWPAuthenticationError when PSN refuses the refresh token:
+    it keeps the error body as its state and fails on the missing keys, then and on every later call.
+
+    Raises:
+        PSNAWPAuthenticationError: If PSN refused the refresh token.
+    """
+    try:
+        return authenticator.obtain_fresh_access_token()
+    except KeyError as error:
+        raise psnawp_exceptions.PSNAWPAuthenticationError(
+            f"PSN refused the refresh token, its answer lacks {error}."
+        ) from error
+
+
+def authenticate(npsso_tokens: list[str]) -> list[Authenticator]:
+    """
+    Authenticates the extra NPSSO tokens of the pool, skipping the ones PSN refuses
+    so an expired service account doesn't keep the bot from starting.
+    """
+    authenticators = []
+    for index, npsso in enumerate(npsso_tokens):
+        try:
+            authenticators.append(Authenticator(npsso))
+        except psnawp_exceptions.PSNAWPAuthenticationError as error:
+            print(f"The extra NPSSO token n°{index} was refused: {error}")
+    return authenticators
+
+
+class CredentialPool:
+    def __init__(self, authenticators: list[Authenticator], max_wait: float):
+        """
+        Spreads the PSN requests over several accounts, picking the least loaded one first,
+        so the throughput grows with the amount of NPSSO tokens.
+        A throttled account is set aside until it may be used again, and an expired one until it is refreshed.
+
+        Args:
+            authenticators (list[Authenticator]): The authenticator of each NPSSO token.
+            max_wait (float): The longest time in seconds a request waits for a throttled account before RateLimited is raised.
+        """
+        self.credentials = [
+            PSNCredential(f"psn-{index}", authenticator)
+            for index, authenticator in enumerate(authenticators)
+        ]
+        self.max_wait = max_wait
+        for credential in self.credentials:
+            self.update_metrics(credential)
+
+    @asynccontextmanager
+    async def use(self) -> AsyncIterator[PSNCredential]:
+        """
+        Lends the available credential with the fewest requests in flight, the least recently used one on ties.
+        Waits for a throttled credential when none is available.
+
+        Raises:
+            RateLimited: If every credential is throttled for longer than max_wait.
+            PSNAWPAuthenticationError: If every credential expired.
+        """
+        credential = await self.pick()
+        credential.in_flight += 1
+        credential.last_used_at = time.monotonic()
+        self.update_metrics(credential)
+        try:
+            yield credential
+        finally:
+            credential.in_flight -= 1
+            self.update_metrics(credential)
+
+    async def pick(self) -> PSNCredential:
+        while True:
+            available = [
+                credential for credential in self.credentials if credential.available
+            ]
+            if available:
+                return min(
+                    available,
+                    key=lambda credential: (
+                        credential.in_flight,
+                        credential.last_used_at,
+                    ),
+                )
+
+            throttled = [
+                credential for credential in self.credentials if not credential.expired
+            ]
+            if not throttled:
+                raise psnawp_exceptions.PSNAWPAuthenticationError(
+                    "Every NPSSO token of the pool expired."
+                )
+            wait = min(credential.throttled_until for credential in throttled)
+            wait -= time.monotonic()
+            if wait > self.max_wait:
+                raise RateLimited("psn", wait)
+            await asyncio.sleep(wait)
+
+    def has_available(self) -> bool:
+        return any(credential.available for credential in self.credentials)
+
+    def set_aside(self, credential: PSNCredential, delay: float):
+        "Stops lending a credential PSN throttled, for the given delay in seconds."
+        credential.throttled_until = max(
+            credential.throttled_until, time.monotonic() + delay
+        )
+        self.update_metrics(credential)
+
+    def expire(self, credential: PSNCredential):
+        "Stops lending a credential whose NPSSO token was refused, until it is refreshed."
+        if not credential.expired:
+            print(f"The NPSSO token {credential.name} expired, it is set aside.")
+        credential.expired = True
+        self.update_metrics(credential)
+
+    def restore(self, credential: PSNCredential):
+        credential.expired = False
+        credential.throttled_until = 0.0
+        self.update_metrics(credential)
+
+    @staticmethod
+    def update_metrics(credential: PSNCredential):
+        credential_in_flight.set(credential.in_flight, credential.name)
+        credential_expired.set(int(credential.expired), credential.name)
@@ -0,0 +1,42 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PSNExecutor:
+    def __init__(self, max_workers: int, max_concurrency: int):
+        """
+        Runs the blocking PSNAWP calls on a dedicated thread pool so they never stall the event loop.
+
+        Args:
+            max_workers (int): The amount of threads available to the pool.
+            max_concurrency (int): The maximum amount of PSNAWP calls allowed to run at the same time.
+        """
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="psnawp"
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs a blocking function on the thread pool and waits for its result.
+
+        Args:
+            func (callable): The blocking function to call.
+            *args: The positional arguments given to the function.
+            **kwargs: The keyword arguments given to the function.
+
+        Returns:
+            Any: The value returned by the function.
+        """
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.pool, functools.partial(func, *args, **kwargs)
+            )
+
+    def shutdown(self):
+        """
+        Stops the thread pool without waiting for the pending calls.
+        """
+        self.pool.shutdown(wait=False, cancel_futures=True)
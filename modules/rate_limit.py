@@ -0,0 +1,193 @@
+import asyncio
+import email.utils
+import random
+import time
+from datetime import datetime, timezone
+
+from . import metrics
+
+rate_limited = metrics.registry.counter(
+    "psnbot_rate_limited_total",
+    "Requests answered 429 by an upstream, by family of endpoints.",
+    "family",
+)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Local token bucket making bursts of requests wait for their turn instead of exceeding a rate limit.
+
+        Args:
+            rate (float): The amount of tokens given back per second.
+            capacity (float): The maximum amount of tokens stored, which is the largest burst allowed.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self):
+        """
+        Waits until a token is available and takes it. Waiters are served in order.
+        """
+        async with self.lock:
+            self.refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Reads the Retry-After header, given either in seconds or as an HTTP date.
+
+    Returns:
+        float | None: The delay in seconds, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimited(Exception):
+    def __init__(self, family: str, retry_after: float):
+        """
+        Raised when an upstream keeps refusing requests for longer than a command can wait.
+
+        Args:
+            family (str): The family of endpoints which is rate limited.
+            retry_after (float): Seconds after which requests should be accepted again.
+        """
+        super().__init__(
+            f"The {family} endpoints are rate limited for {retry_after:.1f} seconds."
+        )
+        self.family = family
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: dict[str, tuple[float, float]],
+        min_ratio: float,
+        decrease: float,
+        increase: float,
+        max_retries: int,
+        backoff: float,
+        max_wait: float,
+    ):
+        """
+        Process-wide governor of the upstream requests, with a token bucket for each family of endpoints.
+        The rate of a family is halved (multiplicative decrease) when it is answered 429, and slowly
+        given back (additive increase) while its requests succeed, so it settles close to the highest
+        rate the upstream accepts.
+
+        Args:
+            limits (dict[str, tuple[float, float]]): The maximum rate and burst of each family.
+            min_ratio (float): The lowest share of its maximum rate a family can be slowed down to.
+            decrease (float): The factor applied to the rate of a family on a 429.
+            increase (float): Requests per second given back for every second of successful requests.
+            max_retries (int): The amount of retries of a request answered 429.
+            backoff (float): The base delay in seconds of the jittered exponential backoff.
+            max_wait (float): The longest pause in seconds a request waits for before RateLimited is raised.
+        """
+        self.limits = limits
+        # The buckets and pauses are kept by (family, scope), the scope being for example a PSN account
+        self.buckets: dict[tuple[str, str | None], TokenBucket] = {}
+        self.paused_until: dict[tuple[str, str | None], float] = {}
+
+        self.min_ratio = min_ratio
+        self.decrease = decrease
+        self.increase = increase
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+
+    def bucket(self, family: str, scope: str = None) -> TokenBucket:
+        bucket = self.buckets.get((family, scope))
+        if bucket is None:
+            rate, burst = self.limits[family]
+            bucket = self.buckets[family, scope] = TokenBucket(rate, burst)
+        return bucket
+
+    async def acquire(self, family: str, scope: str = None):
+        """
+        Waits for the pause of the family to end, then for a token of its bucket.
+
+        Args:
+            scope (str): What shares the limits of the family, when each one has its own (like a PSN account).
+
+        Raises:
+            RateLimited: If the family is paused for longer than max_wait.
+        """
+        pause = self.paused_until.get((family, scope), 0.0) - time.monotonic()
+        if pause > self.max_wait:
+            raise RateLimited(family, pause)
+        if pause > 0:
+            await asyncio.sleep(pause)
+        await self.bucket(family, scope).acquire()
+
+    def succeeded(self, family: str, scope: str = None):
+        bucket = self.bucket(family, scope)
+        # Each request gives back increase / rate, which adds up to `increase` per second at full rate
+        bucket.rate = min(
+            self.limits[family][0], bucket.rate + self.increase / bucket.rate
+        )
+
+    def throttled(
+        self, family: str, retry_after: str | None, attempt: int, scope: str = None
+    ) -> float:
+        """
+        Slows the family down after a 429 and pauses it, for Retry-After if given or else for a jittered exponential delay.
+
+        Args:
+            family (str): The family of the refused request.
+            retry_after (str | None): The Retry-After header of the response.
+            attempt (int): The amount of times this request was already refused.
+            scope (str): The scope of the refused request.
+
+        Returns:
+            float: The pause in seconds.
+
+        Raises:
+            RateLimited: If the request shouldn't be retried.
+        """
+        rate_limited.inc(family)
+        now = time.monotonic()
+        bucket = self.bucket(family, scope)
+        paused_until = self.paused_until.get((family, scope), 0.0)
+        # The other requests refused during the pause were sent before the rate was lowered
+        if now >= paused_until:
+            bucket.rate = max(
+                self.limits[family][0] * self.min_ratio, bucket.rate * self.decrease
+            )
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, self.backoff * 2**attempt)
+        else:
+            # Keeps the waiting requests from all coming back at the same instant
+            delay += random.uniform(0, self.backoff)
+        self.paused_until[family, scope] = max(paused_until, now + delay)
+
+        if attempt >= self.max_retries or delay > self.max_wait:
+            raise RateLimited(family, delay)
+        return delay
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from . import metrics
+
+coalesced_calls = metrics.registry.counter(
+    "psnbot_coalesced_calls_total",
+    "Upstream calls avoided by joining an identical call already in flight.",
+    "flight",
+)
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        """
+        Makes the concurrent lookups of the same key share a single upstream call and its result.
+        A key is only shared while its call is in flight, so nothing older than the call itself is ever served.
+
+        Args:
+            name (str): The name under which the coalesced calls are counted in the metrics.
+        """
+        self.name = name
+        self.calls: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable]) -> Any:
+        """
+        Returns the result of the call in flight for the key, or starts one with fetch.
+        A caller giving up doesn't cancel the call the other callers are waiting for.
+
+        Raises:
+            Exception: The exception raised by the shared call, for every caller.
+        """
+        call = self.calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fetch())
+            self.track(key, call)
+        else:
+            coalesced_calls.inc(self.name)
+        return await asyncio.shield(call)
+
+    async def run_many(
+        self,
+        keys: Iterable[Hashable],
+        fetch_many: Callable[[list], Awaitable[dict]],
+    ) -> dict:
+        """
+        Like run for a batch of keys: the keys already in flight are joined,
+        and the other ones are fetched together by a single call of fetch_many.
+
+        Args:
+            keys (Iterable[Hashable]): The keys to look up.
+            fetch_many (callable): Coroutine function returning the values of the missing keys, by key.
+
+        Returns:
+            dict: The value of each key found.
+        """
+        keys = list(dict.fromkeys(keys))
+        missing_keys = [key for key in keys if key not in self.calls]
+        coalesced_calls.inc(self.name, amount=len(keys) - len(missing_keys))
+
+        if missing_keys:
+            batch = asyncio.ensure_future(fetch_many(missing_keys))
+            for key in missing_keys:
+                self.track(key, asyncio.ensure_future(self.pick(batch, key)))
+
+        calls = [self.calls[key] for key in keys]
+        values = await asyncio.shield(asyncio.gather(*calls))
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    @staticmethod
+    async def pick(batch: asyncio.Future, key: Hashable):
+        return (await batch).get(key)
+
+    def track(self, key: Hashable, call: asyncio.Future):
+        self.calls[key] = call
+
+        def forget(_):
+            if self.calls.get(key) is call:
+                del self.calls[key]
+            # Marks the exception as retrieved, even if every caller gave up
+            if not call.cancelled():
+                call.exception()
+
+        call.add_done_callback(forget)
@@ -0,0 +1,184 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class Storage:
+    def __init__(self, path: str):
+        """
+        Repository of the usage counts, bans and language preferences of the users, stored in a SQLite file.
+        The file is opened in WAL mode, so more than one bot process can share it.
+
+        Args:
+            path (str): The path of the SQLite file.
+        """
+        self.lock = threading.Lock()
+        self.connection = self.connect(path)
+        # The transactions run on their own connection, from the thread flushing the usages,
+        # so the lock taken on the event loop is never held while SQLite waits for another process
+        self.writer = self.connect(path)
+        self.writer.executescript("""
+            CREATE TABLE IF NOT EXISTS usages (
+                user_id TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bans (
+                user_id TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS languages (
+                user_id TEXT PRIMARY KEY,
+                language TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS migrations (
+                name TEXT PRIMARY KEY
+            );
+            """)
+        self.migrate(
+            "ban_expiry", "ALTER TABLE bans ADD COLUMN expires_at REAL DEFAULT NULL"
+        )
+
+        # user_id -> language, every preference being held in memory so the commands never read the file
+        self.languages: dict[str, str] = {}
+        self.reload_languages()
+
+    @staticmethod
+    def connect(path: str) -> sqlite3.Connection:
+        # Transactions are opened explicitly, and the timeout makes writers wait for each other
+        connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """
+        Write transaction taken at once, so concurrent processes can't interleave their writes.
+        It runs on the writer connection, which is only used by one thread at a time.
+        """
+        self.writer.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.writer
+        except BaseException:
+            self.writer.execute("ROLLBACK")
+            raise
+        self.writer.execute("COMMIT")
+
+    def migrate(self, name: str, *statements: str):
+        "Runs the statements of a schema change, only if it didn't run on this database yet."
+        with self.transaction() as connection:
+            if connection.execute(
+                "SELECT 1 FROM migrations WHERE name = ?", (name,)
+            ).fetchone():
+                return
+
+            for statement in statements:
+                connection.execute(statement)
+            connection.execute("INSERT INTO migrations VALUES (?)", (name,))
+
+    def migrate_json(self, usages_path: str, bans_path: str, languages_path: str):
+        """
+        Imports the JSON files used before this storage, only the first time it is opened.
+        """
+        with self.transaction() as connection:
+            if connection.execute(
+                "SELECT 1 FROM migrations WHERE name = 'json'"
+            ).fetchone():
+                return
+
+            usages = self.load_json(usages_path, {})
+            connection.executemany(
+                "INSERT OR IGNORE INTO usages VALUES (?, ?)", usages.items()
+            )
+            bans = self.load_json(bans_path, [])
+            connection.executemany(
+                "INSERT OR IGNORE INTO bans (user_id) VALUES (?)",
+                [(str(user_id),) for user_id in bans],
+            )
+            languages = self.load_json(languages_path, {})
+            connection.executemany(
+                "INSERT OR IGNORE INTO languages VALUES (?, ?)", languages.items()
+            )
+            connection.execute("INSERT INTO migrations VALUES ('json')")
+        self.reload_languages()
+
+    @staticmethod
+    def load_json(path: str, default):
+        if not os.path.exists(path):
+            return default
+        with open(path, "r") as json_file:
+            return json.load(json_file)
+
+    def get_usages(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.connection.execute("SELECT user_id, count FROM usages"))
+
+    def add_usages(self, usages: dict[str, int]) -> dict[str, int]:
+        """
+        Adds amounts to the usage counts of many users in one transaction.
+
+        Returns:
+            dict[str, int]: The new count of each of these users, including the usages added by other bot processes.
+        """
+        with self.transaction() as connection:
+            connection.executemany(
+                """
+                INSERT INTO usages VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET count = count + excluded.count
+                """,
+                usages.items(),
+            )
+            return {
+                user_id: connection.execute(
+                    "SELECT count FROM usages WHERE user_id = ?", (user_id,)
+                ).fetchone()[0]
+                for user_id in usages
+            }
+
+    def get_bans(self) -> dict[str, float | None]:
+        "Gets every banned user, with the timestamp at which their ban expires."
+        with self.lock:
+            return dict(self.connection.execute("SELECT user_id, expires_at FROM bans"))
+
+    # The writes below may wait for another process to commit, so the bot calls them from a thread
+    def ban(self, user_id: int, expires_at: float = None):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bans VALUES (?, ?)", (str(user_id), expires_at)
+            )
+
+    def unban(self, user_id: int):
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM bans WHERE user_id = ?", (str(user_id),)
+            )
+
+    def delete_expired_bans(self, now: float):
+        with self.lock:
+            self.connection.execute("DELETE FROM bans WHERE expires_at <= ?", (now,))
+
+    def get_language(self, user_id: int) -> str | None:
+        return self.languages.get(str(user_id))
+
+    def set_language(self, user_id: int, language: str):
+        user_id = str(user_id)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO languages VALUES (?, ?)", (user_id, language)
+            )
+            self.languages[user_id] = language
+
+    def reload_languages(self):
+        "Reloads every language preference, so the ones changed by other bot processes are seen."
+        with self.lock:
+            self.languages = dict(
+                self.connection.execute("SELECT user_id, language FROM languages")
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+            self.writer.close()
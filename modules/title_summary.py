@@ -0,0 +1,64 @@
+import heapq
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import AsyncIterator
+
+from psnawp_api.models.title_stats import TitleStats
+
+
+@dataclass
+class TitleSummary:
+    recent: list[TitleStats]
+    favorites: list[TitleStats]
+    total_playtime: timedelta
+    total_games: int
+    # Amount of titles read, lower than total_games when the pages were capped
+    counted_games: int
+
+    @property
+    def partial(self) -> bool:
+        return self.counted_games < self.total_games
+
+
+async def summarize_titles(
+    pages: AsyncIterator[tuple[list[TitleStats], int]], top_k: int
+) -> TitleSummary:
+    """
+    Reads the titles in a single pass, keeping only the most recent and most played ones.
+
+    Args:
+        pages (AsyncIterator[tuple[list[TitleStats], int]]): The pages of titles, most recently played first,
+            with the total amount of titles of the user.
+        top_k (int): The amount of recent and favorite titles kept.
+
+    Returns:
+        TitleSummary: The kept titles and the totals of the user.
+    """
+    recent: list[TitleStats] = []
+    # Min-heap of (play duration, -index, title), so the first title read wins the ties like a stable sort
+    favorites: list[tuple[timedelta, int, TitleStats]] = []
+    total_playtime = timedelta()
+    total_games = 0
+    counted_games = 0
+
+    async for titles, total_games in pages:
+        for title in titles:
+            if len(recent) < top_k:
+                recent.append(title)
+
+            entry = (title.play_duration, -counted_games, title)
+            if len(favorites) < top_k:
+                heapq.heappush(favorites, entry)
+            elif top_k:
+                heapq.heappushpop(favorites, entry)
+
+            total_playtime += title.play_duration
+            counted_games += 1
+
+    return TitleSummary(
+        recent,
+        [title for _, _, title in sorted(favorites, reverse=True)],
+        total_playtime,
+        max(total_games, counted_games),
+        counted_games,
+    )
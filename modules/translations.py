@@ -0,0 +1,117 @@
+import json
+import os
+from string import Formatter
+
+# A template is split once into (literal text, field name, format spec, conversion) parts
+Part = tuple[str, str | None, str, str | None]
+
+
+class Language:
+    def __init__(self, name: str, texts: dict[str, str], singular_counts: list[int]):
+        """
+        The texts of one language, parsed once so rendering them doesn't scan the templates again.
+
+        Args:
+            name (str): The name of the language, as displayed to the users.
+            texts (dict[str, str]): The templates of the language by key.
+            singular_counts (list[int]): The counts followed by the singular form of a word.
+        """
+        self.name = name
+        self.singular_counts = frozenset(singular_counts)
+        self.constants: dict[str, str] = {}
+        self.templates: dict[str, list[Part]] = {}
+        for key, text in texts.items():
+            self.add(key, text)
+
+    def add(self, key: str, text: str):
+        parts = list(Formatter().parse(text))
+        if all(field_name is None for _, field_name, _, _ in parts):
+            # Escaped braces are already resolved by the parsing
+            self.constants[key] = "".join(literal for literal, _, _, _ in parts)
+        else:
+            self.templates[key] = parts
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.constants or key in self.templates
+
+    def keys(self) -> set[str]:
+        return self.constants.keys() | self.templates.keys()
+
+    def plural(self, count: int, singular_key: str, plural_key: str) -> str:
+        "Gets the form of a word following the given count."
+        key = singular_key if count in self.singular_counts else plural_key
+        return self.render(key, {})
+
+    def render(self, key: str, kwargs: dict) -> str:
+        constant = self.constants.get(key)
+        if constant is not None:
+            return constant
+
+        rendered = []
+        for literal, field_name, format_spec, conversion in self.templates[key]:
+            rendered.append(literal)
+            if field_name is not None:
+                value = kwargs[field_name]
+                if conversion == "r":
+                    value = repr(value)
+                elif conversion == "s":
+                    value = str(value)
+                elif conversion == "a":
+                    value = ascii(value)
+                rendered.append(format(value, format_spec))
+        return "".join(rendered)
+
+
+class Translator:
+    __slots__ = ("language",)
+
+    def __init__(self, language: Language):
+        "Renders texts in a language resolved once, to be reused for every text of a command."
+        self.language = language
+
+    def __call__(self, key: str, **kwargs) -> str:
+        return self.language.render(key, kwargs)
+
+
+class Translations:
+    def __init__(self, path: str, default: str):
+        """
+        Loads and compiles every language file of a folder.
+        The keys missing from a language are reported and taken from the default language.
+
+        Args:
+            path (str): The folder of the language files.
+            default (str): The name of the language used when a user didn't choose one.
+        """
+        self.languages: dict[str, Language] = {}
+        raw_texts: dict[str, dict[str, str]] = {}
+        singular_counts: dict[str, list[int]] = {}
+        for file in sorted(os.listdir(path)):
+            if not file.endswith(".json"):
+                continue
+
+            with open(os.path.join(path, file), "r") as json_file:
+                language_data: dict = json.load(json_file)
+            raw_texts[language_data["lang-name"]] = language_data["texts"]
+            singular_counts[language_data["lang-name"]] = language_data.get(
+                "singular-counts", [1]
+            )
+
+        self.default = default
+        default_texts = raw_texts[default]
+        for name, texts in raw_texts.items():
+            missing_keys = default_texts.keys() - texts.keys()
+            if missing_keys:
+                print(
+                    f"Missing texts in {name}, using {default} for: {', '.join(sorted(missing_keys))}"
+                )
+            self.languages[name] = Language(
+                name, default_texts | texts, singular_counts[name]
+            )
+
+        self.translators = {
+            name: Translator(language) for name, language in self.languages.items()
+        }
+
+    def translator(self, language_name: str | None) -> Translator:
+        return self.translators.get(language_name) or self.translators[self.default]
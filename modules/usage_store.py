@@ -0,0 +1,60 @@
+import asyncio
+
+from .storage import Storage
+
+
+class UsageStore:
+    def __init__(self, storage: Storage, flush_every: int):
+        """
+        Counts the usages of each user in memory and writes them behind to the storage,
+        so commands never wait for the disk.
+
+        Args:
+            storage (Storage): The storage in which the counts are kept.
+            flush_every (int): The amount of users changed since the last flush after which the counts are written.
+        """
+        self.storage = storage
+        self.flush_every = flush_every
+        # The counts are read from memory: the stored ones, those being written, and those not written yet
+        self.stored: dict[str, int] = storage.get_usages()
+        self.flushing: dict[str, int] = {}
+        self.pending: dict[str, int] = {}
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: asyncio.Task | None = None
+
+    def get(self, user_id: int) -> int:
+        user_id = str(user_id)
+        return (
+            self.stored.get(user_id, 0)
+            + self.flushing.get(user_id, 0)
+            + self.pending.get(user_id, 0)
+        )
+
+    def increment(self, user_id: int):
+        """
+        Adds one to the usage count of a user, scheduling a flush if enough users changed.
+        """
+        user_id = str(user_id)
+        self.pending[user_id] = self.pending.get(user_id, 0) + 1
+
+        if len(self.pending) >= self.flush_every and (
+            self.flush_task is None or self.flush_task.done()
+        ):
+            self.flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        "Adds the pending usages to the storage in a thread, in a single transaction."
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            self.flushing, self.pending = self.pending, {}
+            try:
+                counts = await asyncio.to_thread(self.storage.add_usages, self.flushing)
+            except BaseException:
+                for user_id, count in self.flushing.items():
+                    self.pending[user_id] = self.pending.get(user_id, 0) + count
+                raise
+            else:
+                self.stored.update(counts)
+            finally:
+                self.flushing = {}